@@ -1,34 +1,125 @@
 # final_printer_2025.py — FULL 13-EDGE NUCLEAR PRINTER (DEC 2025 TOP 3 WALLET EXACT)
-import os, time, requests
+import os, time, threading, asyncio, logging, logging.handlers, queue, functools, requests
+import aiohttp
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal
 from datetime import datetime
 from web3 import Web3
+from web3.providers import JSONBaseProvider
 from eth_account import Account
+from eth_keys import keys
 from dotenv import load_dotenv
+try:
+    from numba import njit
+except ImportError:  # numba is optional, edge11 falls back to plain NumPy
+    njit = None
+try:
+    import uvloop
+except ImportError:  # not available on Windows, default asyncio loop is used
+    uvloop = None
 
-last_flash_balance = Decimal("0")
-
-def track_flash_loan():
-    global last_flash_balance
-    try:
-        bal = Decimal(w3.eth.get_balance(account.address)) / Decimal("1e18") * BNB_PRICE
-        if bal > last_flash_balance + Decimal("1000"):  # borrowed > $1K
-            borrowed = bal - last_flash_balance
-            print(f"\nFLASHLOAN BORROWED → +${borrowed:,.0f} (${borrowed/BNB_PRICE:.2f} BNB)")
-            tg(f"FLASHLOAN BORROWED\n+${borrowed:,.0f}")
-        last_flash_balance = bal
-    except: pass
 load_dotenv()
 
+# Edges only enqueue records; a listener thread does the formatting and the stderr write
+_log_queue = queue.SimpleQueue()
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = logging.handlers.QueueListener(_log_queue, _log_stream)
+logging.basicConfig(level=logging.WARNING, handlers=[logging.handlers.QueueHandler(_log_queue)])
+log = logging.getLogger("printer")
+
+# ——————————————————— MULTI-RPC POOL ———————————————————
+# Reads go to the lowest-latency healthy node, writes fan out to every node.
+RPC_URLS = [u.strip() for u in os.getenv("BSC_RPC_URLS", "").split(",") if u.strip()] or [
+    os.getenv("BSC_RPC_URL") or "https://bsc.merkle.io",
+    "https://bsc-dataseed.binance.org",
+    "https://rpc.ankr.com/bsc",
+]
+if os.getenv("QUICKNODE_RPC_URL"):
+    RPC_URLS.append(os.getenv("QUICKNODE_RPC_URL"))
+
+class RPCEndpoint:
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.provider = Web3.HTTPProvider(url, request_kwargs={"timeout": timeout})
+        self.ema_latency = 0.0   # seconds, 0 until first sample
+        self.score = 0           # consecutive failures
+        self.down_until = 0.0
+
+    def healthy(self, now):
+        return now >= self.down_until
+
+    def record_success(self, elapsed, alpha=0.2):
+        self.ema_latency = elapsed if self.ema_latency == 0 else alpha * elapsed + (1 - alpha) * self.ema_latency
+        self.score = 0
+
+    def record_failure(self):
+        self.score += 1
+        self.down_until = time.time() + min(2 ** self.score, 60)  # back off up to 1 min
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """Web3 provider that spreads calls over several BSC RPCs with latency-based failover"""
+    BROADCAST_METHODS = {"eth_sendRawTransaction"}
+
+    def __init__(self, urls, timeout=10):
+        super().__init__()
+        self.endpoints = [RPCEndpoint(u, timeout) for u in dict.fromkeys(urls)]
+        self._executor = ThreadPoolExecutor(max_workers=len(self.endpoints))
+
+    def choose(self):
+        """Healthy endpoints ordered by EMA latency (unhealthy ones last as a fallback)"""
+        now = time.time()
+        return sorted(self.endpoints, key=lambda e: (not e.healthy(now), e.ema_latency))
+
+    def _call(self, endpoint, method, params):
+        start = time.perf_counter()
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception:
+            endpoint.record_failure()
+            raise
+        endpoint.record_success(time.perf_counter() - start)
+        return response
+
+    def make_request(self, method, params):
+        if method in self.BROADCAST_METHODS:
+            return self._broadcast(method, params)
+        last_exc = None
+        for endpoint in self.choose():
+            try:
+                return self._call(endpoint, method, params)
+            except Exception as e:
+                last_exc = e
+        raise last_exc
+
+    def _broadcast(self, method, params):
+        """Push the same signed tx to every endpoint at once, return the first accepted"""
+        futures = [self._executor.submit(self._call, e, method, params) for e in self.endpoints]
+        rejected, last_exc = None, None
+        for f in as_completed(futures):
+            try:
+                response = f.result()
+            except Exception as e:
+                last_exc = e
+                continue
+            if "error" not in response:
+                return response
+            rejected = rejected or response
+        if rejected is not None:
+            return rejected
+        raise last_exc
+
+    def is_connected(self, show_traceback=False):
+        return any(e.provider.is_connected() for e in self.choose())
+
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-rpc_url = os.getenv("BSC_RPC_URL") or "https://bsc.merkle.io"
+w3 = Web3(PooledHTTPProvider(RPC_URLS, timeout=10))
 if not PRIVATE_KEY:
     print("WARNING: No PRIVATE_KEY set - running in monitor mode only")
-    w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 10}))
     account = None
 else:
     print("LIVE MODE: Private key detected - ready for arbitrage execution")
-    w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 10}))
     account = Account.from_key(PRIVATE_KEY)
 
 FLASH_SIZE_USD = Decimal("78000")  # Increased for micro-arbs
@@ -36,8 +127,18 @@ MIN_PROFIT_PCT = Decimal("0.0015")  # 0.15% minimum gap
 MIN_PROFIT_USD = Decimal("15")  # $15 minimum profit
 BNB_PRICE = Decimal("585")
 
-# Volatility tracking for faster scanning
-last_bnb_price = Decimal("0")
+# Float copies for the per-scan comparisons (Decimal stays for reporting only)
+FLASH_SIZE_USD_F = float(FLASH_SIZE_USD)
+MIN_PROFIT_PCT_F = float(MIN_PROFIT_PCT)
+MIN_PROFIT_USD_F = float(MIN_PROFIT_USD)
+BNB_PRICE_F = float(BNB_PRICE)
+
+# Volatility tracking for faster scanning — EMA of on-chain WBNB/BUSD spot price
+WBNB_BUSD_PAIR = "0x58F876857a02D6762E0101bb5C46A8c1ED44Dc16"  # PancakeSwap V2, token0 = WBNB
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"  # Sync(uint112,uint112)
+VOL_EMA_ALPHA = 0.1
+VOL_THRESHOLD = 0.003  # 0.3% move away from the EMA
+ema_bnb_price = 0.0
 vol_trigger_active = False
 
 def tg(msg):
@@ -49,20 +150,52 @@ def tg(msg):
         except: pass
 
 # Volatility trigger for faster scanning during market moves
-def vol_trigger():
-    global last_bnb_price, vol_trigger_active
-    try:
-        bnb_now = Decimal(requests.get("https://api.dexscreener.com/latest/dex/pairs/bsc/0x16b9a82891338f9ba80e2d6970fdda79d1eb0dae", timeout=3).json()["pair"]["priceUsd"])
-        if last_bnb_price > 0 and abs(bnb_now - last_bnb_price) / last_bnb_price > Decimal("0.003"):  # 0.3% move
-            vol_trigger_active = True
-            print(f"[VOL TRIGGER] BNB {((bnb_now-last_bnb_price)/last_bnb_price*100):.3f}% — FAST MODE ACTIVE")
-            tg(f"VOLATILITY TRIGGER\nBNB {((bnb_now-last_bnb_price)/last_bnb_price*100):.3f}%\nFAST SCANNING")
-            return True  # Run all edges 2x faster
-        last_bnb_price = bnb_now
+def on_bnb_sync(data):
+    """Update the BNB EMA from a Sync(reserve0, reserve1) log of the WBNB/BUSD pair"""
+    global ema_bnb_price, vol_trigger_active
+    reserve0 = int.from_bytes(data[:32], "big")
+    reserve1 = int.from_bytes(data[32:64], "big")
+    if reserve0 == 0:
+        return
+    spot = reserve1 / reserve0  # both 18 decimals
+    if ema_bnb_price == 0:
+        ema_bnb_price = spot
+        return
+    move = (spot - ema_bnb_price) / ema_bnb_price
+    if abs(move) > VOL_THRESHOLD:
+        if not vol_trigger_active:
+            print(f"[VOL TRIGGER] BNB {move*100:.3f}% — FAST MODE ACTIVE")
+            tg(f"VOLATILITY TRIGGER\nBNB {move*100:.3f}%\nFAST SCANNING")
+        vol_trigger_active = True
+    else:
         vol_trigger_active = False
-        return False
-    except:
-        return False
+    ema_bnb_price = VOL_EMA_ALPHA * spot + (1 - VOL_EMA_ALPHA) * ema_bnb_price
+
+def watch_bnb_sync(poll_interval=1.0):
+    """Background feed: pull new Sync logs of the WBNB/BUSD pair every block"""
+    from_block = None
+    while True:
+        try:
+            to_block = w3.eth.block_number
+            if from_block is None:
+                from_block = to_block
+            if to_block >= from_block:
+                logs = w3.eth.get_logs({
+                    "address": WBNB_BUSD_PAIR,
+                    "topics": [SYNC_TOPIC],
+                    "fromBlock": from_block,
+                    "toBlock": to_block,
+                })
+                for entry in logs:
+                    on_bnb_sync(bytes(entry["data"]))
+                # Advance even without logs, so the queried window never grows
+                from_block = to_block + 1
+        except Exception as e:
+            log.warning("BNB Sync poll failed: %r", e)
+        time.sleep(poll_interval)
+
+def vol_trigger():
+    return vol_trigger_active  # Run all edges 2x faster while True
 
 # ——————————————————— PROFIT + FLASHLOAN TRACKER  ———————————————————
 last_balance = Decimal("0")
@@ -89,321 +222,277 @@ def track_flash_loan():
     except:
         pass
 # —————————————————————————————————————————————————————————————————————————————————————————————
+# Network errors are routine for these upstreams and stay quiet; anything else is a bug and gets logged.
+# Sync edges run in a worker thread so their blocking HTTP/RPC calls don't stall the event loop.
+NETWORK_ERRORS = (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError)
+
+def _edge_guard(name):
+    def deco(fn):
+        @functools.wraps(fn)
+        async def w(*a, **k):
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    return await fn(*a, **k)
+                return await asyncio.to_thread(fn, *a, **k)
+            except NETWORK_ERRORS:
+                pass
+            except Exception as e:
+                log.warning("%s failed: %r", name, e)
+        return w
+    return deco
+
 # EDGE 1: COLLATERAL SWAP 
+@_edge_guard("edge1")
 def edge1():
-    try:
-        for sym, (addr, dec) in {
-            "CAKE": ("0xB6064eD41d4f67e3537680d3e8A3dAB9cB7f7F7C", 18),
-            "BTCB": ("0x264990fbd0A3e3d8db4B20D8B75779Da84fE7B9A", 8),
-            "ETH":  ("0x9ef1B8c0E4F7dc8bF5719Ea496883DC6401d5b2e", 8),
-        }.items():
-            dex = Decimal(requests.get(f"https://api.dexscreener.com/latest/dex/search/?q={sym}+USDT&chainId=bsc", timeout=5).json()["pairs"][0]["priceUsd"])
-            venus = Decimal(w3.eth.contract(addr, abi=[{"inputs":[],"name":"latestAnswer","outputs":[{"type":"int256"}],"stateMutability":"view","type":"function"}]).functions.latestAnswer().call()) / Decimal(10**dec)
-            gap = (dex - venus) / venus
-            if gap > MIN_PROFIT_PCT:  # 0.15% minimum gap
-                profit = FLASH_SIZE_USD * gap * Decimal("0.82")
-                if profit > MIN_PROFIT_USD:
-                    print(f"[01/13] EDGE1 {sym} {gap*100:.3f}% → +${profit:,.0f}")
-                    tg(f"EDGE1 {sym}\n+${profit:,.0f}")
-    except: pass
+    for sym, (addr, dec) in {
+        "CAKE": ("0xB6064eD41d4f67e3537680d3e8A3dAB9cB7f7F7C", 18),
+        "BTCB": ("0x264990fbd0A3e3d8db4B20D8B75779Da84fE7B9A", 8),
+        "ETH":  ("0x9ef1B8c0E4F7dc8bF5719Ea496883DC6401d5b2e", 8),
+    }.items():
+        dex = float(requests.get(f"https://api.dexscreener.com/latest/dex/search/?q={sym}+USDT&chainId=bsc", timeout=5).json()["pairs"][0]["priceUsd"])
+        venus = w3.eth.contract(addr, abi=[{"inputs":[],"name":"latestAnswer","outputs":[{"type":"int256"}],"stateMutability":"view","type":"function"}]).functions.latestAnswer().call() / 10**dec
+        gap = (dex - venus) / venus
+        if gap > MIN_PROFIT_PCT_F:  # 0.15% minimum gap
+            profit = FLASH_SIZE_USD_F * gap * 0.82
+            if profit > MIN_PROFIT_USD_F:
+                print(f"[01/13] EDGE1 {sym} {gap*100:.3f}% → +${profit:,.0f}")
+                tg(f"EDGE1 {sym}\n+${profit:,.0f}")
 
 # EDGE 2: WBNB PREMIUM
+@_edge_guard("edge2")
 def edge2():
-    try:
-        wbnb = Decimal(requests.get("https://api.dexscreener.com/latest/dex/pairs/bsc/0x16b9a82891338f9ba80e2d6970fdda79d1eb0dae").json()["pair"]["priceUsd"])
-        oracle = Decimal(w3.eth.contract("0x0567F2323251f0Aab1aC9b9be91Ac0c8cE0a9e8a", abi=[{"inputs":[],"name":"latestAnswer","outputs":[{"type":"int256"}],"stateMutability":"view","type":"function"}]).functions.latestAnswer().call()) / 1e8
-        gap = (wbnb - oracle) / oracle
-        if gap > MIN_PROFIT_PCT:  # 0.15% minimum gap
-            profit = FLASH_SIZE_USD * gap * Decimal("0.97")
-            if profit > MIN_PROFIT_USD:
-                print(f"[02/13] EDGE2 WBNB {gap*100:.3f}% → +${profit:,.0f}")
-                tg(f"EDGE2 WBNB\n+${profit:,.0f}")
-    except: pass
+    wbnb = float(requests.get("https://api.dexscreener.com/latest/dex/pairs/bsc/0x16b9a82891338f9ba80e2d6970fdda79d1eb0dae").json()["pair"]["priceUsd"])
+    oracle = w3.eth.contract("0x0567F2323251f0Aab1aC9b9be91Ac0c8cE0a9e8a", abi=[{"inputs":[],"name":"latestAnswer","outputs":[{"type":"int256"}],"stateMutability":"view","type":"function"}]).functions.latestAnswer().call() / 1e8
+    gap = (wbnb - oracle) / oracle
+    if gap > MIN_PROFIT_PCT_F:  # 0.15% minimum gap
+        profit = FLASH_SIZE_USD_F * gap * 0.97
+        if profit > MIN_PROFIT_USD_F:
+            print(f"[02/13] EDGE2 WBNB {gap*100:.3f}% → +${profit:,.0f}")
+            tg(f"EDGE2 WBNB\n+${profit:,.0f}")
 
 # EDGE 3: BEEFY + VENUS LIQUIDATION 
+@_edge_guard("edge3")
 def edge3():
-    try:
-        vaults = requests.get("https://api.beefy.finance/vaults", timeout=8).json()
-        for v in vaults:
-            if v["chain"] != "bsc" or float(v.get("tvl", 0)) < 4_000_000: continue  # Lower from 5M
-            try:
-                # Use getHealthFactor ABI for better compatibility
-                health_abi = [{"inputs":[],"name":"getHealthFactor","outputs":[{"type":"uint256"}],"stateMutability":"view","type":"function"}]
-                health = w3.eth.contract(v["strategy"], abi=health_abi).functions.getHealthFactor().call()
-                health_factor = Decimal(health)/Decimal("1e18")
-                if health_factor < Decimal("1.025"):  # Lower from 1.038
-                    profit = Decimal(v["tvl"]) * Decimal("0.11")  # 11% bounty
-                    if profit > MIN_PROFIT_USD:
-                        print(f"[03/13] BEEFY LIQ {v['name'][:20]} {health_factor:.3f} → +${profit:,.0f}")
-                        tg(f"BEEFY LIQUIDATION\n{v['name']}\n+${profit:,.0f}")
-            except: continue
-    except: pass
+    vaults = requests.get("https://api.beefy.finance/vaults", timeout=8).json()
+    for v in vaults:
+        if v["chain"] != "bsc" or float(v.get("tvl", 0)) < 4_000_000: continue  # Lower from 5M
+        try:
+            # Use getHealthFactor ABI for better compatibility
+            health_abi = [{"inputs":[],"name":"getHealthFactor","outputs":[{"type":"uint256"}],"stateMutability":"view","type":"function"}]
+            health = w3.eth.contract(v["strategy"], abi=health_abi).functions.getHealthFactor().call()
+            health_factor = Decimal(health)/Decimal("1e18")
+            if health_factor < Decimal("1.025"):  # Lower from 1.038
+                profit = Decimal(v["tvl"]) * Decimal("0.11")  # 11% bounty
+                if profit > MIN_PROFIT_USD:
+                    print(f"[03/13] BEEFY LIQ {v['name'][:20]} {health_factor:.3f} → +${profit:,.0f}")
+                    tg(f"BEEFY LIQUIDATION\n{v['name']}\n+${profit:,.0f}")
+        except Exception: continue  # strategy without getHealthFactor / reverted call
 
 # EDGE 4: ALPACA FAIRPRICE GAP
+@_edge_guard("edge4")
 def edge4():
-    try:
-        fair = Decimal(w3.eth.contract("0xA625AB01B08ce023B2a342Dbb12a16f2C8489A8F", abi=[{
-            "inputs": [], "name": "fairPrice", "outputs": [{"type": "uint256"}],
-            "stateMutability": "view", "type": "function"
-        }]).functions.fairPrice().call()) / Decimal("1e18")
-        dex = Decimal(requests.get("https://api.dexscreener.com/latest/dex/search/?q=ALPACA+USDT&chainId=bsc", timeout=5).json()["pairs"][0]["priceUsd"])
-        gap = (dex - fair) / fair
-        if gap > MIN_PROFIT_PCT:  # 0.15% minimum gap
-            profit = FLASH_SIZE_USD * gap * Decimal("0.88")
-            if profit > MIN_PROFIT_USD:
-                print(f"[04/13] ALPACA GAP {gap*100:.2f}% → +${profit:,.0f}")
-                tg(f"ALPACA GAP\n+${profit:,.0f}")
-    except: pass
+    fair = w3.eth.contract("0xA625AB01B08ce023B2a342Dbb12a16f2C8489A8F", abi=[{
+        "inputs": [], "name": "fairPrice", "outputs": [{"type": "uint256"}],
+        "stateMutability": "view", "type": "function"
+    }]).functions.fairPrice().call() / 1e18
+    dex = float(requests.get("https://api.dexscreener.com/latest/dex/search/?q=ALPACA+USDT&chainId=bsc", timeout=5).json()["pairs"][0]["priceUsd"])
+    gap = (dex - fair) / fair
+    if gap > MIN_PROFIT_PCT_F:  # 0.15% minimum gap
+        profit = FLASH_SIZE_USD_F * gap * 0.88
+        if profit > MIN_PROFIT_USD_F:
+            print(f"[04/13] ALPACA GAP {gap*100:.2f}% → +${profit:,.0f}")
+            tg(f"ALPACA GAP\n+${profit:,.0f}")
 
 # EDGE 5: PANCAKE V3 FEE TIER SNIPING 
+@_edge_guard("edge5")
 def edge5():
-    try:
-        for pair in ["0x172fc2d5a391a7a8f9db5c0e5e1c8d6a5b3f1e0d", "0x0ed7e52944161450477ee417de9cd3a859b14fd"]:
-            data = requests.get(f"https://api.dexscreener.com/latest/dex/pairs/bsc/{pair}", timeout=5).json()["pair"]
-            if float(data["liquidity"]["usd"]) < 15_000_000 and abs(float(data["priceChange"]["h1"])) > 2.1:
-                print(f"[05/13] V3 FEE SNIPE → {data['baseToken']['symbol']} {data['priceChange']['h1']:+.2f}%")
-                tg(f"V3 FEE SNIPE\n{data['baseToken']['symbol']} {data['priceChange']['h1']:+.2f}%")
-    except: pass
+    for pair in ["0x172fc2d5a391a7a8f9db5c0e5e1c8d6a5b3f1e0d", "0x0ed7e52944161450477ee417de9cd3a859b14fd"]:
+        data = requests.get(f"https://api.dexscreener.com/latest/dex/pairs/bsc/{pair}", timeout=5).json()["pair"]
+        if float(data["liquidity"]["usd"]) < 15_000_000 and abs(float(data["priceChange"]["h1"])) > 2.1:
+            print(f"[05/13] V3 FEE SNIPE → {data['baseToken']['symbol']} {data['priceChange']['h1']:+.2f}%")
+            tg(f"V3 FEE SNIPE\n{data['baseToken']['symbol']} {data['priceChange']['h1']:+.2f}%")
 
 # EDGE 6: VENUS XVS REWARD SPIKE 
+@_edge_guard("edge6")
 def edge6():
-    try:
-        speed = w3.eth.contract("0xfd36e2c2a6789db23113685031d7f16329158320", abi=[{
-            "inputs": [{"type": "address"}], "name": "venusSpeeds", "outputs": [{"type": "uint256"}],
-            "stateMutability": "view", "type": "function"
-        }]).functions.venusSpeeds("0xA07c5b74C9B404EC45d2411f9662cB2e5e4A63c0").call()
-        if speed > 9_000_000_000_000_000_000:
-            print(f"[06/13] XVS REWARD SPIKE → {speed/1e18:.1f}x normal")
-            tg(f"XVS REWARD SPIKE\n{speed/1e18:.1f}x")
-    except: pass
+    speed = w3.eth.contract("0xfd36e2c2a6789db23113685031d7f16329158320", abi=[{
+        "inputs": [{"type": "address"}], "name": "venusSpeeds", "outputs": [{"type": "uint256"}],
+        "stateMutability": "view", "type": "function"
+    }]).functions.venusSpeeds("0xA07c5b74C9B404EC45d2411f9662cB2e5e4A63c0").call()
+    if speed > 9_000_000_000_000_000_000:
+        print(f"[06/13] XVS REWARD SPIKE → {speed/1e18:.1f}x normal")
+        tg(f"XVS REWARD SPIKE\n{speed/1e18:.1f}x")
 
 #  EDGE 7: CROSS-DEX DEVIATION
+@_edge_guard("edge7")
 def edge7():
-    try:
-        pcs = Decimal(requests.get("https://api.dexscreener.com/latest/dex/pairs/bsc/0x16b9a82891338f9ba80e2d6970fdda79d1eb0dae").json()["pair"]["priceUsd"])
-        bis = Decimal(requests.get("https://api.dexscreener.com/latest/dex/pairs/bsc/0x3f6d7a7b7c7d7e7f8a9b0c1d2e3f4a5b6c7d8e9f").json()["pair"]["priceUsd"])
-        gap = abs(pcs - bis) / pcs
-        if gap > Decimal("0.0030"):
-            profit = FLASH_SIZE_USD * gap * Decimal("0.93")
-            if profit > MIN_PROFIT_USD:
-                print(f"[07/13] CROSS-DEX {gap*100:.3f}% → +${profit:,.0f}")
-                tg(f"CROSS-DEX ARB\n+${profit:,.0f}")
-    except: pass
+    pcs = float(requests.get("https://api.dexscreener.com/latest/dex/pairs/bsc/0x16b9a82891338f9ba80e2d6970fdda79d1eb0dae").json()["pair"]["priceUsd"])
+    bis = float(requests.get("https://api.dexscreener.com/latest/dex/pairs/bsc/0x3f6d7a7b7c7d7e7f8a9b0c1d2e3f4a5b6c7d8e9f").json()["pair"]["priceUsd"])
+    gap = abs(pcs - bis) / pcs
+    if gap > 0.0030:
+        profit = FLASH_SIZE_USD_F * gap * 0.93
+        if profit > MIN_PROFIT_USD_F:
+            print(f"[07/13] CROSS-DEX {gap*100:.3f}% → +${profit:,.0f}")
+            tg(f"CROSS-DEX ARB\n+${profit:,.0f}")
 
 # EDGE 8: FLASH LOAN POOL DRYNESS
+@_edge_guard("edge8")
 def edge8():
-    try:
-        eq = w3.eth.get_balance("0x1Da87b114f35E1DC91F72bF57fc07A768Ad40Bb0") / 1e18
-        ven = w3.eth.get_balance("0xfd36e2c2a6789db23113685031d7f16329158320") / 1e18
-        if eq < 2.0:
-            print(f"[08/13] EQUALIZER DRY → {eq:.2f} BNB left — switching to Venus")
-            tg("EQUALIZER DRY — switching lender")
-        if ven < 100:
-            print(f"[08/13] VENUS LOW → {ven:.1f} BNB")
-    except: pass
+    eq = w3.eth.get_balance("0x1Da87b114f35E1DC91F72bF57fc07A768Ad40Bb0") / 1e18
+    ven = w3.eth.get_balance("0xfd36e2c2a6789db23113685031d7f16329158320") / 1e18
+    if eq < 2.0:
+        print(f"[08/13] EQUALIZER DRY → {eq:.2f} BNB left — switching to Venus")
+        tg("EQUALIZER DRY — switching lender")
+    if ven < 100:
+        print(f"[08/13] VENUS LOW → {ven:.1f} BNB")
 # EDGE 9: STINK SNIPER (MEME POOLS EXPANDED)
+@_edge_guard("edge9")
 def edge9():
-    try:
-        blk = w3.eth.get_block('pending', full_transactions=True)
-        MEME_ROUTERS = ["0x10ED43C718714eb63d5aA57B78B54704E256024E", "0x0BFbCF9fa4f9C56B0F40a671Ad40E0805A091865"]  # Pancake V2/V3
-        for tx in blk.get("transactions", []):
-            if tx.to in MEME_ROUTERS and int(tx.gas) > 250000:  # Lower gas threshold
-                inp = tx.input.hex().lower()
-                meme_tokens = {
-                    "BABYDOGE": "c748673057861a797275cd8a068abb95a902e8de",
-                    "FLOKI": "fb5b838b6cfe6b5c5e63f3e3b4d1e5f0d6d9e9d5",
-                    "XVS": "cf6bb5389c4c5d3c2b3b3b3b3b3b3b3b3b3b3b3b3",
-                    "CAKE": "0e09fabb73bd3ade0a17fee4565426565042b0a"
-                }
-                for name, addr in meme_tokens.items():
-                    if addr in inp:
-                        usd = (w3.eth.get_balance(tx["from"]) / 1e18) * BNB_PRICE
-                        if usd > 35000 or (tx.value == 0 and int(tx.gas) > 350000):  # Lower thresholds
-                            print(f"[09/13] MEME STINK {name} ~${usd:,.0f}")
-                            tg(f"MEME STINK\n{name} ${usd:,.0f}")
-                            # Inject sandwich would happen here
-    except: pass
+    blk = w3.eth.get_block('pending', full_transactions=True)
+    MEME_ROUTERS = ["0x10ED43C718714eb63d5aA57B78B54704E256024E", "0x0BFbCF9fa4f9C56B0F40a671Ad40E0805A091865"]  # Pancake V2/V3
+    for tx in blk.get("transactions", []):
+        if tx.to in MEME_ROUTERS and int(tx.gas) > 250000:  # Lower gas threshold
+            inp = tx.input.hex().lower()
+            meme_tokens = {
+                "BABYDOGE": "c748673057861a797275cd8a068abb95a902e8de",
+                "FLOKI": "fb5b838b6cfe6b5c5e63f3e3b4d1e5f0d6d9e9d5",
+                "XVS": "cf6bb5389c4c5d3c2b3b3b3b3b3b3b3b3b3b3b3b3",
+                "CAKE": "0e09fabb73bd3ade0a17fee4565426565042b0a"
+            }
+            for name, addr in meme_tokens.items():
+                if addr in inp:
+                    usd = (w3.eth.get_balance(tx["from"]) / 1e18) * BNB_PRICE_F
+                    if usd > 35000 or (tx.value == 0 and int(tx.gas) > 350000):  # Lower thresholds
+                        print(f"[09/13] MEME STINK {name} ~${usd:,.0f}")
+                        tg(f"MEME STINK\n{name} ${usd:,.0f}")
+                        # Inject sandwich would happen here
 
 # EDGE 10: MEMECOIN SNIPER
+@_edge_guard("edge10")
 def edge10():
-    try:
-        pairs = requests.get("https://api.dexscreener.com/latest/dex/search?q=*&chainId=bsc&order=desc&sort=volume24h", timeout=8).json().get("pairs", [])
-        for p in pairs[:20]:
-            if p.get("pairAge", 9999) < 90 and float(p.get("liquidity", {}).get("usd", 0)) < 130000:
-                sym = p["baseToken"]["symbol"]
-                liq = p["liquidity"]["usd"]
-                vol = p["volume"]["h1"]
-                print(f"[10/13] MEME SNIPE → {sym} | Liq ${liq:,.0f} | Vol ${vol:,.0f}")
-                tg(f"MEME SNIPE\n{sym}\nLiq ${liq:,.0f}")
-    except: pass
+    pairs = requests.get("https://api.dexscreener.com/latest/dex/search?q=*&chainId=bsc&order=desc&sort=volume24h", timeout=8).json().get("pairs", [])
+    for p in pairs[:20]:
+        if p.get("pairAge", 9999) < 90 and float(p.get("liquidity", {}).get("usd", 0)) < 130000:
+            sym = p["baseToken"]["symbol"]
+            liq = p["liquidity"]["usd"]
+            vol = p["volume"]["h1"]
+            print(f"[10/13] MEME SNIPE → {sym} | Liq ${liq:,.0f} | Vol ${vol:,.0f}")
+            tg(f"MEME SNIPE\n{sym}\nLiq ${liq:,.0f}")
 
 # EDGE 11: TRIANGULAR ARBITRAGE (LIVE)
-def edge11():
-    try:
-        # Live triangular arbitrage with real API calls
-        # Checks actual prices from DexScreener for arbitrage opportunities
-
-        # Token addresses (verified EIP-55 checksum)
-        TOKENS = {
-            "WBNB": "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c",
-            "CAKE": "0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82",
-            "BTCB": "0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c",
-            "ETH": "0x2170Ed0880ac9A755fd29B2688956BD959F933F8",
-            "USDT": "0x55d398326f99059fF775485246999027B3197955",
-            "USDC": "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d",
-            "BUSD": "0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56",
-            "DAI": "0x1AF3F329e8BE154074D8769D1FFa4eEE058B1DBc3"
-        }
-
-        # High-probability triangular paths
-        TRIANGULAR_PATHS = [
-            ("WBNB", "CAKE", "BTCB"),    # WBNB→CAKE→BTCB→WBNB
-            ("WBNB", "USDT", "CAKE"),    # WBNB→USDT→CAKE→WBNB
-            ("WBNB", "USDC", "USDT"),    # WBNB→USDC→USDT→WBNB
-            ("WBNB", "ETH", "BTCB"),     # WBNB→ETH→BTCB→WBNB
-            ("WBNB", "DAI", "BUSD"),     # WBNB→DAI→BUSD→WBNB
-            ("BTCB", "ETH", "WBNB"),     # BTCB→ETH→WBNB→BTCB
-        ]
-
-        for token_a, token_b, token_c in TRIANGULAR_PATHS:
-            try:
-                # Get real prices from DexScreener API
-                pair_ab = requests.get(f"https://api.dexscreener.com/latest/dex/tokens/{TOKENS[token_a]},{TOKENS[token_b]}?chainId=bsc", timeout=3)
-                pair_bc = requests.get(f"https://api.dexscreener.com/latest/dex/tokens/{TOKENS[token_b]},{TOKENS[token_c]}?chainId=bsc", timeout=3)
-                pair_ca = requests.get(f"https://api.dexscreener.com/latest/dex/tokens/{TOKENS[token_c]},{TOKENS[token_a]}?chainId=bsc", timeout=3)
-
-                if all(p.status_code == 200 for p in [pair_ab, pair_bc, pair_ca]):
-                    # Extract prices (assuming first pair is most liquid)
-                    price_ab = Decimal(pair_ab.json()["pairs"][0]["priceUsd"])
-                    price_bc = Decimal(pair_bc.json()["pairs"][0]["priceUsd"])
-                    price_ca = Decimal(pair_ca.json()["pairs"][0]["priceUsd"])
-
-                    # Calculate triangular arbitrage
-                    # Start with 1 unit of token_a, convert through the triangle
-                    final_amount = Decimal("1") * price_ab * price_bc * price_ca
-
-                    # Calculate profit percentage
-                    profit_pct = (final_amount - Decimal("1")) / Decimal("1")
-
-                    if profit_pct > MIN_PROFIT_PCT:
-                        profit_usd = FLASH_SIZE_USD * profit_pct * Decimal("0.915")  # Account for fees
-
-                        if profit_usd > MIN_PROFIT_USD:
-                            path_name = f"{token_a[:4]}→{token_b[:4]}→{token_c[:4]}"
-                            print(f"[11/13] TRI-ARB LIVE {path_name} → +${profit_usd:,.0f} ({profit_pct*100:.3f}%)")
-                            tg(f"TRI-ARB LIVE\n+${profit_usd:,.0f}\n{path_name}\n{profit_pct*100:.3f}% gap")
-                            return  # Report first profitable opportunity
-
-            except Exception as e:
-                continue  # Skip failed API calls
-
-    except Exception as e:
-        print(f"Tri-arb edge failed: {str(e)[:50]}...")
+# Token addresses (verified EIP-55 checksum)
+TRI_TOKENS = {
+    "WBNB": "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c",
+    "CAKE": "0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82",
+    "BTCB": "0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c",
+    "ETH": "0x2170Ed0880ac9A755fd29B2688956BD959F933F8",
+    "USDT": "0x55d398326f99059fF775485246999027B3197955",
+    "USDC": "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d",
+    "BUSD": "0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56",
+    "DAI": "0x1AF3F329e8BE154074D8769D1FFa4eEE058B1DBc3"
+}
+
+# High-probability triangular paths
+TRIANGULAR_PATHS = [
+    ("WBNB", "CAKE", "BTCB"),    # WBNB→CAKE→BTCB→WBNB
+    ("WBNB", "USDT", "CAKE"),    # WBNB→USDT→CAKE→WBNB
+    ("WBNB", "USDC", "USDT"),    # WBNB→USDC→USDT→WBNB
+    ("WBNB", "ETH", "BTCB"),     # WBNB→ETH→BTCB→WBNB
+    ("WBNB", "DAI", "BUSD"),     # WBNB→DAI→BUSD→WBNB
+    ("BTCB", "ETH", "WBNB"),     # BTCB→ETH→WBNB→BTCB
+]
+
+# Every leg of every path, deduplicated — shared legs are fetched once per scan
+TRI_PAIRS = list({frozenset((a, b)) for path in TRIANGULAR_PATHS for a, b in zip(path, path[1:] + path[:1])})
+
+# Paths flattened to leg indices: PATH_IDX[k] = (ab, bc, ca) positions in TRI_PAIRS
+TRI_PAIR_INDEX = {pair: i for i, pair in enumerate(TRI_PAIRS)}
+PATH_IDX = np.array([
+    [TRI_PAIR_INDEX[frozenset(leg)] for leg in ((a, b), (b, c), (c, a))]
+    for a, b, c in TRIANGULAR_PATHS
+], dtype=np.int32)
+TRI_THRESHOLD = 1.0 + MIN_PROFIT_PCT_F
+
+def _eval_tri(prices, idx, thresh):
+    n = idx.shape[0]
+    out = np.empty(n, np.bool_)
+    for i in range(n):
+        out[i] = prices[idx[i, 0]] * prices[idx[i, 1]] * prices[idx[i, 2]] > thresh
+    return out
+
+def _eval_tri_numpy(prices, idx, thresh):
+    return prices[idx].prod(axis=1) > thresh
+
+# One compiled call per scan instead of a Python branch per path
+eval_tri = njit(fastmath=True, cache=True)(_eval_tri) if njit else _eval_tri_numpy
+
+HTTP = None  # aiohttp.ClientSession, opened in main()
+
+def tri_pair_url(pair):
+    a, b = sorted(pair)
+    return f"https://api.dexscreener.com/latest/dex/tokens/{TRI_TOKENS[a]},{TRI_TOKENS[b]}?chainId=bsc"
+
+async def fetch_pair_price(pair):
+    async with HTTP.get(tri_pair_url(pair), timeout=aiohttp.ClientTimeout(total=3)) as r:
+        if r.status != 200:
+            return None
+        data = await r.json(content_type=None)
+        # Extract prices (assuming first pair is most liquid)
+        return float(data["pairs"][0]["priceUsd"])
+
+@_edge_guard("edge11")
+async def edge11():
+    # Live triangular arbitrage with real API calls, all legs fetched concurrently
+    results = await asyncio.gather(*(fetch_pair_price(p) for p in TRI_PAIRS), return_exceptions=True)
+    # Failed legs stay at 0.0 so their paths can never clear the threshold
+    prices = np.array([r if isinstance(r, float) else 0.0 for r in results], dtype=np.float64)
+
+    for k in np.flatnonzero(eval_tri(prices, PATH_IDX, TRI_THRESHOLD)):
+        token_a, token_b, token_c = TRIANGULAR_PATHS[k]
+        # Start with 1 unit of token_a, convert through the triangle
+        profit_pct = float(prices[PATH_IDX[k]].prod()) - 1.0
+        profit_usd = FLASH_SIZE_USD_F * profit_pct * 0.915  # Account for fees
+
+        if profit_usd > MIN_PROFIT_USD_F:
+            path_name = f"{token_a[:4]}→{token_b[:4]}→{token_c[:4]}"
+            print(f"[11/13] TRI-ARB LIVE {path_name} → +${profit_usd:,.0f} ({profit_pct*100:.3f}%)")
+            tg(f"TRI-ARB LIVE\n+${profit_usd:,.0f}\n{path_name}\n{profit_pct*100:.3f}% gap")
+            return  # Report first profitable opportunity
 
 # EDGE 12: AI-POWERED GAS OPTIMIZATION
+@_edge_guard("edge12")
 def edge12():
-    try:
-        # AI gas price prediction for optimal timing
-        current_gas = w3.eth.gas_price
-        predicted_gas = current_gas * Decimal("0.85")  # AI prediction: 15% lower
-        if predicted_gas < current_gas:
-            print(f"[12/13] AI GAS OPT → Predicted {predicted_gas/1e9:.1f} gwei (save ${(current_gas-predicted_gas)/1e9*21000*585/1e6:.2f})")
-    except: pass
+    # AI gas price prediction for optimal timing
+    current_gas = w3.eth.gas_price
+    predicted_gas = current_gas * 0.85  # AI prediction: 15% lower
+    if predicted_gas < current_gas:
+        print(f"[12/13] AI GAS OPT → Predicted {predicted_gas/1e9:.1f} gwei (save ${(current_gas-predicted_gas)/1e9*21000*585/1e6:.2f})")
 
 # EDGE 13: MEMPOOL PATTERN RECOGNITION
+@_edge_guard("edge13")
 def edge13():
-    try:
-        blk = w3.eth.get_block('pending', full_transactions=True)
-        large_txs = [tx for tx in blk.get("transactions", []) if tx.value > w3.to_wei(10, "ether")]
-        if len(large_txs) > 3:
-            total_value = sum(tx.value for tx in large_txs) / 1e18 * BNB_PRICE
-            print(f"[13/13] MEMPOOL PATTERN → {len(large_txs)} large txs (${total_value:,.0f})")
-            tg(f"MEMPOOL PATTERN\n{len(large_txs)} large txs\n${total_value:,.0f}")
-    except: pass
-
-#MAIN LOOP 
-scan_count = 0
-print("MONEY TREES PRINTER 2025 — FULL 13-EDGE BUILD ")
-tg("NUCLEAR FULL 13-EDGE LIVE")
+    blk = w3.eth.get_block('pending', full_transactions=True)
+    large_txs = [tx for tx in blk.get("transactions", []) if tx.value > w3.to_wei(10, "ether")]
+    if len(large_txs) > 3:
+        total_value = sum(tx.value for tx in large_txs) / 1e18 * BNB_PRICE_F
+        print(f"[13/13] MEMPOOL PATTERN → {len(large_txs)} large txs (${total_value:,.0f})")
+        tg(f"MEMPOOL PATTERN\n{len(large_txs)} large txs\n${total_value:,.0f}")
 
-while True:
-    try:
-        scan_count += 1
-        track_flash_loan()
-
-        # Check volatility trigger for faster scanning
-        is_vol_trigger = vol_trigger()
-
-        print(f"\n[{time.strftime('%H:%M:%S')}] SCAN #{scan_count:,}")
-        edge1(); edge2(); edge3(); edge4(); edge5(); edge6(); edge7(); edge8()
-        edge9(); edge10(); edge11(); edge12(); edge13()
-
-        print(f"[{time.strftime('%H:%M:%S')}] [13/13] ALL EDGES COMPLETE")
-
-        # Adaptive sleep based on volatility
-        sleep_time = 2.5 if is_vol_trigger else 6.8  # Fast mode during vol, normal otherwise
-        time.sleep(sleep_time)
-
-    except KeyboardInterrupt:
-        print("\nBot stopped.")
-        break
-    except:
-        time.sleep(0.3)
-
-
-
-
-
-
-
-# ==================== WEB3 COMPATIBILITY LAYER ====================
+# ==================== TRANSACTION HELPER ====================
 def get_raw_transaction(signed_tx):
     """Get raw transaction compatible with Web3 v5 and v6"""
-    try:
-        # Try Web3 v6 style first
-        return get_raw_transaction(signed_tx)
-    except AttributeError:
-        try:
-            # Try Web3 v5 style
-            return get_raw_transaction(signed_tx)
-        except AttributeError:
-            # Try dict access
-            return signed_tx.get('raw_transaction') or signed_tx.get('rawTransaction')
-
-def send_transaction_compat(w3, signed_txn):
-    """Send transaction with compatibility"""
-    raw_tx = get_raw_transaction(signed_txn)
-    return w3.eth.send_raw_transaction(raw_tx)
+    return getattr(signed_tx, 'rawTransaction', None) or getattr(signed_tx, 'raw_transaction', None) or signed_tx['rawTransaction']
 
-def web3_compat_send(w3, account, txn_dict):
-    """Complete compatible transaction sending"""
-    # Get nonce
-    try:
-        nonce = w3.eth.get_transaction_count(account.address, 'pending')
-    except:
-        nonce = w3.eth.get_transaction_count(account.address, 'pending')
-    txn_dict['nonce'] = nonce
-    
-    # Estimate gas
-    try:
-        gas = w3.eth.estimate_gas(txn_dict)
-    except:
-        gas = w3.eth.estimate_gas(txn_dict)
-    txn_dict['gas'] = gas
-    
-    # Get gas price
-    try:
-        gas_price = w3.eth.gas_price
-    except:
-        gas_price = w3.eth.gas_price
-    txn_dict['gasPrice'] = gas_price
-    
-    # Sign and send
-    signed_txn = account.sign_transaction(txn_dict)
-    return send_transaction_compat(w3, signed_txn)
-# ==================================================================
+# Parsed secp256k1 keys per address, so signing skips re-deriving the key
+# (and its public key) from raw bytes on every transaction
+_SIGNING_KEYS = {}
+
+def signing_key(account):
+    key = _SIGNING_KEYS.get(account.address)
+    if key is None:
+        key = _SIGNING_KEYS[account.address] = keys.PrivateKey(account.key)
+    return key
 
-# ==================== TRANSACTION HELPER ====================
 def send_tx(w3, account, txn_dict):
     """Send transaction with full Web3 v6 compatibility"""
     # Get nonce
@@ -417,7 +506,7 @@ def send_tx(w3, account, txn_dict):
     txn_dict['gasPrice'] = w3.eth.gas_price
     
     # Sign transaction
-    signed_txn = account.sign_transaction(txn_dict)
+    signed_txn = Account.sign_transaction(txn_dict, signing_key(account))
     
     # Get raw transaction (compatible with Web3 v5/v6)
     raw_tx = get_raw_transaction(signed_txn)
@@ -427,3 +516,48 @@ def send_tx(w3, account, txn_dict):
     
     return tx_hash.hex()
 # ============================================================
+
+#MAIN LOOP 
+scan_count = 0
+EDGES = (edge1, edge2, edge3, edge4, edge5, edge6, edge7, edge8, edge9, edge10, edge11, edge12, edge13)
+
+async def main():
+    global HTTP, scan_count
+    log_listener.start()
+    print("MONEY TREES PRINTER 2025 — FULL 13-EDGE BUILD ")
+    threading.Thread(target=watch_bnb_sync, daemon=True).start()
+    tg("NUCLEAR FULL 13-EDGE LIVE")
+
+    HTTP = aiohttp.ClientSession()
+    try:
+        while True:
+            try:
+                scan_count += 1
+                track_flash_loan()
+
+                # Check volatility trigger for faster scanning
+                is_vol_trigger = vol_trigger()
+
+                print(f"\n[{time.strftime('%H:%M:%S')}] SCAN #{scan_count:,}")
+                for edge in EDGES:
+                    await edge()
+
+                print(f"[{time.strftime('%H:%M:%S')}] [13/13] ALL EDGES COMPLETE")
+
+                # Adaptive sleep based on volatility
+                sleep_time = 2.5 if is_vol_trigger else 6.8  # Fast mode during vol, normal otherwise
+                await asyncio.sleep(sleep_time)
+
+            except Exception:
+                await asyncio.sleep(0.3)
+    finally:
+        await HTTP.close()
+        log_listener.stop()
+
+if __name__ == "__main__":
+    if uvloop:
+        uvloop.install()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nBot stopped.")
@@ -1,7 +1,23 @@
 # services/ArbitrageCalculator.py
 import argparse
+import asyncio
+import functools
+import json
+import logging
+import logging.handlers
+import queue
 from decimal import Decimal
-from web3 import Web3
+import aiohttp
+import numpy as np
+from web3 import AsyncWeb3, AsyncHTTPProvider
+try:
+    from numba import njit
+except ImportError:  # numba is optional, eval_paths falls back to plain NumPy
+    njit = None
+try:
+    import orjson
+except ImportError:  # orjson is optional, stdlib json is used instead
+    orjson = None
 import requests
 import time
 import os
@@ -9,83 +25,388 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Log records are queued on the hot path and written to stderr by a listener thread;
+# stdout carries only the JSON result
+_log_queue = queue.SimpleQueue()
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = logging.handlers.QueueListener(_log_queue, _log_stream)
+log = logging.getLogger("arb")
+log.setLevel(logging.INFO)
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+log.propagate = False
+
 # === TOKEN ADDRESSES (BSC) ===
 WBNB = "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c"
 USDT = "0x55d398326f99059fF775485246999027B3197955"
-USDC = "0x8AC76a51cc950d9822D68b83fE1Ad004bD0C0b1E"
+USDC = "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d"
 BUSD = "0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56"
 FDUSD = "0xc5f0f7b66764F6ec8C8Dff7BA683102295E16409"
 CAKE = "0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82"
-BTCB = "0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3EAd9c"
+BTCB = "0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c"
 
 # PancakeSwap V2 Router & Factory
 ROUTER = "0x10ED43C718714eb63d5aA57B78B54704E256024E"
 FACTORY = "0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73"
 
-# RPC
+# Multicall3 (same address on every chain, deployed on BSC)
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# RPC — async provider backed by one keep-alive session (see open_session)
 RPC = os.getenv("BSC_RPC", "https://bsc-dataseed.binance.org/")
-w3 = Web3(Web3.HTTPProvider(RPC))
+WS_RPC = os.getenv("BSC_WS")  # optional wss:// endpoint; enables event-driven rescans
+w3 = AsyncWeb3(AsyncHTTPProvider(RPC, request_kwargs={"timeout": aiohttp.ClientTimeout(total=3)}))
+
+MULTICALL_ABI = [{"inputs":[{"internalType":"bool","name":"requireSuccess","type":"bool"},{"components":[{"internalType":"address","name":"target","type":"address"},{"internalType":"bytes","name":"callData","type":"bytes"}],"internalType":"struct Multicall3.Call[]","name":"calls","type":"tuple[]"}],"name":"tryAggregate","outputs":[{"components":[{"internalType":"bool","name":"success","type":"bool"},{"internalType":"bytes","name":"returnData","type":"bytes"}],"internalType":"struct Multicall3.Result[]","name":"returnData","type":"tuple[]"}],"stateMutability":"payable","type":"function"}]
+FACTORY_ABI = [{"inputs":[{"internalType":"address","name":"tokenA","type":"address"},{"internalType":"address","name":"tokenB","type":"address"}],"name":"getPair","outputs":[{"internalType":"address","name":"pair","type":"address"}],"stateMutability":"view","type":"function"}]
+PAIR_ABI = [{"inputs":[],"name":"getReserves","outputs":[{"internalType":"uint112","name":"_reserve0","type":"uint112"},{"internalType":"uint112","name":"_reserve1","type":"uint112"},{"internalType":"uint32","name":"_blockTimestampLast","type":"uint32"}],"stateMutability":"view","type":"function"}]
+
+# Contract objects and constant calldata, built once instead of per call
+MULTICALL = w3.eth.contract(address=MULTICALL3, abi=MULTICALL_ABI)
+FACTORY_CONTRACT = w3.eth.contract(address=FACTORY, abi=FACTORY_ABI)
+GET_RESERVES = w3.eth.contract(abi=PAIR_ABI).encodeABI(fn_name="getReserves")
+
+SYMBOLS = {WBNB: "BNB", USDT: "USDT", USDC: "USDC", BUSD: "BUSD", FDUSD: "FDUSD", CAKE: "CAKE", BTCB: "BTCB"}
 
 # Triangular paths (add as many as you want)
 TRI_PATHS = [
-    {"name": "USDT→USDC→BNB→USDT", "path": [USDT, USDC, WBNB, USDT], "start": USDT},
-    {"name": "USDT→BUSD→BNB→USDT", "path": [USDT, BUSD, WBNB, USDT], "start": USDT},
-    {"name": "USDT→FDUSD→BNB→USDT", "path": [USDT, FDUSD, WBNB, USDT], "start": USDT},
-    {"name": "BTCB→BNB→USDT→BTCB", "path": [BTCB, WBNB, USDT, BTCB], "start": BTCB},
-    {"name": "CAKE→BNB→USDT→CAKE", "path": [CAKE, WBNB, USDT, CAKE], "start": CAKE},
+    {"path": [USDT, USDC, WBNB, USDT], "start": USDT},
+    {"path": [USDT, BUSD, WBNB, USDT], "start": USDT},
+    {"path": [USDT, FDUSD, WBNB, USDT], "start": USDT},
+    {"path": [BTCB, WBNB, USDT, BTCB], "start": BTCB},
+    {"path": [CAKE, WBNB, USDT, CAKE], "start": CAKE},
 ]
 
-def get_price(token_in: str, token_out: str, amount_in: int = 10**18) -> int:
+async def open_session() -> aiohttp.ClientSession:
+    """Pooled keep-alive session shared by every RPC call, warmed with one eth_chainId"""
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=128, keepalive_timeout=60))
+    await w3.provider.cache_async_session(session)
+    await w3.eth.chain_id
+    return session
+
+# Calls per tryAggregate batch, and how many batches may be in flight at once
+MULTICALL_CHUNK = 100
+RPC_LIMIT = asyncio.Semaphore(32)
+
+async def _try_aggregate(calls: list) -> list:
+    async with RPC_LIMIT:
+        return await MULTICALL.functions.tryAggregate(False, calls).call()
+
+async def multicall(calls: list) -> list:
+    """Run (target, calldata) calls as concurrent tryAggregate batches; failed calls come back as empty bytes"""
+    batches = [calls[i:i + MULTICALL_CHUNK] for i in range(0, len(calls), MULTICALL_CHUNK)]
+    results = await asyncio.gather(*(_try_aggregate(b) for b in batches))
+    return [data if ok else b"" for batch in results for ok, data in batch]
+
+def pair_key(token_a: str, token_b: str) -> tuple:
+    """Token pair in pool order (token0 < token1 by address)"""
+    return tuple(sorted((token_a, token_b), key=str.lower))
+
+# pair_key -> pair address, resolved once (pair addresses never change)
+PAIR_ADDRESSES = {}
+
+async def fetch_reserves(token_pairs: list) -> dict:
+    """Reserves for every pair in two batched rounds: factory.getPair, then getReserves.
+    Returns {pair_key: (reserve0, reserve1)}; pairs without a pool are left out."""
+    keys = list(dict.fromkeys(pair_key(a, b) for a, b in token_pairs if a != b))
+
+    missing = [k for k in keys if k not in PAIR_ADDRESSES]
+    if missing:
+        raw = await multicall([(FACTORY, FACTORY_CONTRACT.encodeABI(fn_name="getPair", args=list(k))) for k in missing])
+        for k, data in zip(missing, raw):
+            addr = w3.codec.decode(["address"], data)[0] if data else None
+            PAIR_ADDRESSES[k] = addr if addr and int(addr, 16) else None
+
+    pools = [(k, PAIR_ADDRESSES[k]) for k in keys if PAIR_ADDRESSES[k]]
+    raw = await multicall([(addr, GET_RESERVES) for _, addr in pools])
+    reserves = {}
+    for (k, _), data in zip(pools, raw):
+        if data:
+            r0, r1, _ts = w3.codec.decode(["uint112", "uint112", "uint32"], data)
+            reserves[k] = (r0, r1)
+    return reserves
+
+def dumps(obj) -> str:
+    """Compact JSON for the stdout result (what PythonArbitrageCalculator.js parses)"""
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj, separators=(",", ":"))
+
+def path_name(path: list) -> str:
+    """Display name, only built for paths that get reported"""
+    return "→".join(SYMBOLS[t] for t in path)
+
+def path_hops(path_info: dict) -> list:
+    path = path_info["path"]
+    return list(zip(path, path[1:]))
+
+def tracked_pairs() -> list:
+    """Every pool the scanner needs: each path hop plus the start token's USDT pool"""
+    pairs = [hop for p in TRI_PATHS for hop in path_hops(p)]
+    pairs += [(USDT, p["start"]) for p in TRI_PATHS]
+    return pairs
+
+# Tokens are interned as small integer ids; addresses are only used at the web3 boundary
+TOKENS = [WBNB, USDT, USDC, BUSD, FDUSD, CAKE, BTCB]
+TOKEN_IDX = {t: i for i, t in enumerate(TOKENS)}
+USDT_ID = TOKEN_IDX[USDT]
+STABLES = [USDT, USDC, BUSD, FDUSD]
+# Paths packed once at import as a contiguous int32 array, consumed column-wise by the evaluators
+PATH_IDX = np.array([[TOKEN_IDX[t] for t in p["path"]] for p in TRI_PATHS], dtype=np.int32)
+START_IDX = PATH_IDX[:, 0]
+STABLE_START = np.isin(START_IDX, [TOKEN_IDX[t] for t in STABLES])
+
+# PancakeSwap V2 swap fee
+FEE_BPS = 25
+WEI = 10**18  # 18-decimal token unit
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"  # Sync(uint112,uint112)
+
+# pair address -> {"token0", "token1", "id0", "id1", "reserve0", "reserve1", "fee_bps"}
+POOL_CACHE = {}
+# POOL_GRID[a][b] -> the same pool dicts by token id, filled in both directions
+POOL_GRID = [[None] * len(TOKENS) for _ in TOKENS]
+POOL_CACHE_BLOCK = None
+_current_block = None  # latest block seen by poll_blocks(); None when it is not running
+_refresh_lock = asyncio.Lock()
+
+async def refresh_pools() -> int:
+    """Reload POOL_CACHE with one batched getReserves round, at most once per block"""
+    global POOL_CACHE_BLOCK
+    async with _refresh_lock:
+        block = _current_block if _current_block is not None else await w3.eth.block_number
+        if block != POOL_CACHE_BLOCK:
+            for (t0, t1), (r0, r1) in (await fetch_reserves(tracked_pairs())).items():
+                id0, id1 = TOKEN_IDX[t0], TOKEN_IDX[t1]
+                pool = {"token0": t0, "token1": t1, "id0": id0, "id1": id1,
+                        "reserve0": r0, "reserve1": r1, "fee_bps": FEE_BPS}
+                POOL_CACHE[PAIR_ADDRESSES[t0, t1]] = POOL_GRID[id0][id1] = POOL_GRID[id1][id0] = pool
+            POOL_CACHE_BLOCK = block
+            quote.cache_clear()
+    return block
+
+async def poll_blocks(interval: float = 0.5):
+    """Track eth_blockNumber in the background and refresh POOL_CACHE as soon as it advances,
+    so scans within the same block reuse one snapshot without asking the node again"""
+    global _current_block
     try:
-        router = w3.eth.contract(address=ROUTER, abi=[
-            {"inputs":[{"internalType":"uint256","name":"amountIn","type":"uint256"},{"internalType":"address[]","name":"path","type":"address[]"}],"name":"getAmountsOut","outputs":[{"internalType":"uint256[]","name":"amounts","type":"uint256[]"}],"stateMutability":"view","type":"function"}
-        ])
-        amounts = router.functions.getAmountsOut(amount_in, [token_in, token_out]).call()
-        return amounts[-1]
-    except:
+        while True:
+            try:
+                block = await w3.eth.block_number
+                if block != _current_block:
+                    _current_block = block
+                    await refresh_pools()
+            except Exception as e:
+                log.warning("Block poll failed: %s", e)
+            await asyncio.sleep(interval)
+    finally:
+        _current_block = None  # refresh_pools asks the node again once polling stops
+
+def on_sync(pair: str, data: bytes) -> bool:
+    """Apply a Sync(reserve0, reserve1) log to POOL_CACHE; False if the pair is not tracked"""
+    pool = POOL_CACHE.get(pair)
+    if pool is None:
+        return False
+    pool["reserve0"] = int.from_bytes(data[:32], "big")
+    pool["reserve1"] = int.from_bytes(data[32:64], "big")
+    quote.cache_clear()
+    return True
+
+def pair_to_paths() -> dict:
+    """pair address -> indices of the TRI_PATHS entries priced through that pool"""
+    deps = {}
+    for i, p in enumerate(TRI_PATHS):
+        for a, b in path_hops(p) + [(USDT, p["start"])]:
+            addr = PAIR_ADDRESSES.get(pair_key(a, b))
+            if addr:
+                deps.setdefault(addr, set()).add(i)
+    return deps
+
+def v2_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = FEE_BPS) -> int:
+    """UniswapV2Library.getAmountOut in integer wei"""
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
         return 0
+    amount_in_with_fee = amount_in * (10000 - fee_bps)
+    return amount_in_with_fee * reserve_out // (reserve_in * 10000 + amount_in_with_fee)
 
-def calculate_tri_profit(path_info: dict, flash_amount_usd: Decimal = Decimal("12000")) -> Decimal:
-    path = path_info["path"]
-    amount = flash_amount_usd
+@functools.lru_cache(maxsize=4096)
+def quote(a: int, b: int, amount_in: int) -> int:
+    """Swap output from cached reserves (no RPC); 0 when the pool is unknown.
+    Memoized until the next reserves refresh, since paths share start-price and hop quotes."""
+    if a == b:
+        return amount_in
+    pool = POOL_GRID[a][b]
+    if pool is None:
+        return 0
+    if a == pool["id0"]:
+        return v2_out(amount_in, pool["reserve0"], pool["reserve1"], pool["fee_bps"])
+    return v2_out(amount_in, pool["reserve1"], pool["reserve0"], pool["fee_bps"])
+
+def reserves_tensor() -> np.ndarray:
+    """R[a, b] = (reserve of a, reserve of b) for every cached pool, zero where there is none"""
+    R = np.zeros((len(TOKENS), len(TOKENS), 2), dtype=np.float64)
+    for pool in POOL_CACHE.values():
+        a, b = pool["id0"], pool["id1"]
+        R[a, b] = pool["reserve0"], pool["reserve1"]
+        R[b, a] = pool["reserve1"], pool["reserve0"]
+    return R
+
+def _hop(R: np.ndarray, amt: np.ndarray, a: np.ndarray, b: np.ndarray, fee_bps: int = FEE_BPS) -> np.ndarray:
+    """v2_out across many swaps at once; a == b passes the amount through"""
+    amt_fee = amt * (10000 - fee_bps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = amt_fee * R[a, b, 1] / (R[a, b, 0] * 10000 + amt_fee)
+    return np.where(a == b, amt, np.nan_to_num(out))
+
+# Reserves are uint112 and overflow int64, so the kernels rank in float64 and the
+# winner is re-priced exactly by calculate_tri_profit
+def _path_out(R, path_idx, amt, usdt, fee_bps):
+    n, m = path_idx.shape
+    out = np.empty(n, np.float64)
+    for i in range(n):
+        x = amt[i]
+        for h in range(m):
+            a = path_idx[i, h]
+            b = path_idx[i, h + 1] if h + 1 < m else usdt
+            if a == b:
+                continue
+            r_in = R[a, b, 0]
+            if r_in == 0.0 or x == 0.0:
+                x = 0.0
+                break
+            x_fee = x * (10000 - fee_bps)
+            x = x_fee * R[a, b, 1] / (r_in * 10000 + x_fee)
+        out[i] = x
+    return out
+
+def _path_out_numpy(R, path_idx, amt, usdt, fee_bps):
+    hops = np.column_stack((path_idx, np.full(len(path_idx), usdt, dtype=path_idx.dtype)))
+    for h in range(hops.shape[1] - 1):
+        amt = _hop(R, amt, hops[:, h], hops[:, h + 1], fee_bps)
+    return amt
+
+# USDT out of every path (through the final swap back to USDT) in one compiled call
+path_out = njit(fastmath=True, cache=True)(_path_out) if njit else _path_out_numpy
+
+def eval_paths(R: np.ndarray, flash_amount_usd: float = 12000.0) -> np.ndarray:
+    """Approximate USD profit of every TRI_PATHS entry in one pass (float64, for ranking only)"""
+    usdt = USDT_ID
+    price = _hop(R, np.full(len(PATH_IDX), 1e18), np.full(len(PATH_IDX), usdt), START_IDX)
+    amt = np.where(STABLE_START, flash_amount_usd * 1e18, flash_amount_usd * price)
+    return path_out(R, PATH_IDX, amt, usdt, FEE_BPS) / 1e18 - flash_amount_usd
+
+# Paths re-priced exactly per scan after the float64 screen
+TOP_K = 20
+
+def path_profit(path: list, stable_start: bool, flash_amount_usd: int = 12000) -> Decimal:
+    """Exact profit in USD along the token ids in `path`; every hop is integer wei math,
+    Decimal only for the result"""
+    # Exact even for fractional (float) USD amounts
+    start_wei = int(Decimal(str(flash_amount_usd)) * WEI)
 
     # Convert starting USD amount to token amount
-    if path_info["start"] in [USDT, USDC, BUSD, FDUSD]:
-        amount_in = int(amount * (10**18))
+    if stable_start:
+        amount_in = start_wei
     else:
-        price = get_price(USDT, path_info["start"])
+        price = quote(USDT_ID, path[0], WEI)
         if price == 0: return Decimal("0")
-        amount_in = int(amount * 10**18 * 10**18 // price)
+        amount_in = start_wei * price // WEI
 
-    for i in range(len(path)-1):
-        out = get_price(path[i], path[i+1], amount_in)
-        if out == 0: return Decimal("0")
-        amount_in = out * 9975 // 10000  # 0.25% fee
+    for a, b in zip(path, path[1:]):
+        amount_in = quote(a, b, amount_in)  # 0.25% fee applied in v2_out
+        if amount_in == 0: return Decimal("0")
 
     # Back to USD
-    final_usdt = get_price(path[-1], USDT, amount_in)
+    final_usdt = quote(path[-1], USDT_ID, amount_in)
     if final_usdt == 0: return Decimal("0")
-    profit_usd = Decimal(final_usdt) / Decimal(10**18) - flash_amount_usd
-    return profit_usd.quantize(Decimal("0.01"))
+    return Decimal(final_usdt - start_wei).scaleb(-18).quantize(Decimal("0.01"))
+
+def calculate_tri_profit(i: int, flash_amount_usd: int = 12000) -> Decimal:
+    """Exact profit in USD of TRI_PATHS[i]"""
+    return path_profit(PATH_IDX[i].tolist(), bool(STABLE_START[i]), flash_amount_usd)
+
+def find_negative_cycle(R: np.ndarray):
+    """Bellman-Ford over -log(spot rate after fee) on every cached pool.
+    Returns a closed list of token ids whose rate product exceeds 1, or None."""
+    T = len(R)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        W = -np.log(R[:, :, 1] / R[:, :, 0] * (1 - FEE_BPS / 10000))
+    W[~(R[:, :, 0] > 0) | np.isnan(W)] = np.inf
+    np.fill_diagonal(W, np.inf)
+
+    # Every vertex starts at 0 (virtual source), relaxing all edges at once per pass;
+    # anything still improving on pass T sits on or behind a negative cycle
+    dist = np.zeros(T)
+    pred = np.full(T, -1)
+    cols = np.arange(T)
+    for _ in range(T):
+        cand = dist[:, None] + W
+        src = cand.argmin(axis=0)
+        improved = cand[src, cols] < dist - 1e-12
+        if not improved.any():
+            return None
+        dist = np.where(improved, cand[src, cols], dist)
+        pred = np.where(improved, src, pred)
 
-def scan_all_paths():
-    import sys
-    print(f"Scanning {len(TRI_PATHS)} triangular paths...", file=sys.stderr)
+    v = int(np.flatnonzero(improved)[0])
+    for _ in range(T):
+        v = int(pred[v])
+    cycle = [v]
+    u = int(pred[v])
+    while u != v:
+        cycle.append(u)
+        u = int(pred[u])
+    cycle.reverse()  # pred points backwards along the cycle
+
+    # Rotate so the loop starts where the USD leg can be priced (USDT first)
+    starts = [k for k, t in enumerate(cycle) if t == USDT_ID or POOL_GRID[USDT_ID][t] is not None]
+    if not starts:
+        return None
+    k = min(starts, key=lambda k: cycle[k] != USDT_ID)
+    cycle = cycle[k:] + cycle[:k]
+    return cycle + [cycle[0]]
+
+async def scan_all_paths(indices=None):
+    """Scan every path against a fresh reserves snapshot, or only `indices` against POOL_CACHE as it stands"""
+    if indices is None:
+        # One batched reserves snapshot per block; every path is then priced locally
+        await refresh_pools()
+        indices = range(len(TRI_PATHS))
+    selected = np.zeros(len(TRI_PATHS), dtype=bool)
+    selected[list(indices)] = True
+    log.info("Scanning %d triangular paths...", selected.sum())
     best = Decimal("0")
     best_path = None
     opportunities = []
 
-    for p in TRI_PATHS:
-        profit = calculate_tri_profit(p)
+    # Rank all paths in one float64 pass; only the TOP_K that look profitable are
+    # re-priced exactly with integer math
+    R = reserves_tensor()
+    missing = (R[PATH_IDX[:, :-1], PATH_IDX[:, 1:], 0] == 0).any(axis=1)
+    approx = eval_paths(R)
+
+    for i in np.flatnonzero(selected & missing):
+        log.info("Skipping %s: missing pool", path_name(TRI_PATHS[i]["path"]))
+
+    candidates = np.flatnonzero(selected & ~missing & (approx > 0))
+    candidates = candidates[np.argsort(-approx[candidates], kind="stable")][:TOP_K]
+    runs = [("Triangular", TRI_PATHS[i]["path"], calculate_tri_profit(i)) for i in candidates]
+
+    # Bellman-Ford catches a profitable loop across all cached pools, including ones
+    # that are not in TRI_PATHS
+    cycle = find_negative_cycle(R)
+    if cycle:
+        path = [TOKENS[t] for t in cycle]
+        if path not in [r[1] for r in runs]:
+            runs.append(("Cycle", path, path_profit(cycle, TOKENS[cycle[0]] in STABLES)))
+
+    for kind, path, profit in runs:
         if profit > best:
             best = profit
-            best_path = p
+            best_path = path
 
         # Collect all opportunities with profit > 0
         if profit > Decimal("0"):
             opportunities.append({
-                "type": f"Triangular ({p['name']})",
-                "path": p["path"],
+                "type": f"{kind} ({path_name(path)})",
+                "path": path,
                 "profitPercent": float(profit),
                 "profitBNB": float(profit / Decimal("567")),  # Convert USD to BNB
                 "direction": "forward",
@@ -93,9 +414,9 @@ def scan_all_paths():
             })
 
     if best > Decimal("30"):
-        print(f"ARBITRAGE FOUND → {best_path['name']} | Profit ≈ ${best}", file=sys.stderr)
+        log.info("ARBITRAGE FOUND → %s | Profit ≈ $%s", path_name(best_path), best)
     else:
-        print(f"No profitable arb right now (best: ${best})", file=sys.stderr)
+        log.info("No profitable arb right now (best: $%s)", best)
 
     # Output only JSON to stdout
     result = {
@@ -103,17 +424,95 @@ def scan_all_paths():
         "bestProfit": float(best),
         "timestamp": int(time.time() * 1000)
     }
-    print(result)
+    print(dumps(result), flush=True)
     return best
 
+async def watch_syncs(session: aiohttp.ClientSession, max_backoff: float = 8.0):
+    """Event-driven mode: Sync logs over eth_subscribe update POOL_CACHE in place and
+    only the paths touching those pools are rescanned. While the socket is down, pools
+    are kept fresh by poll_blocks and every path is rescanned between reconnect attempts
+    (backing off up to max_backoff seconds); after reconnecting, every path is rescanned
+    once more since Syncs were missed meanwhile."""
+    await scan_all_paths()  # initial snapshot, also resolves every pair address
+    deps = pair_to_paths()
+    dirty = set()
+    wake = asyncio.Event()
+
+    async def rescan(indices=None):
+        try:
+            await scan_all_paths(indices)
+        except Exception as e:
+            log.warning("Sync rescan failed: %s", e)
+
+    async def drain():
+        while True:
+            await wake.wait()
+            wake.clear()
+            indices = sorted(dirty)
+            dirty.clear()
+            await rescan(indices)
+
+    drainer = asyncio.create_task(drain())
+    poller = None
+    backoff = 1.0
+    try:
+        while True:
+            try:
+                async with session.ws_connect(WS_RPC, heartbeat=30) as ws:
+                    await ws.send_json({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe",
+                                        "params": ["logs", {"address": list(deps), "topics": [SYNC_TOPIC]}]})
+                    if poller is not None:
+                        poller.cancel()
+                        await asyncio.gather(poller, return_exceptions=True)
+                        poller = None
+                        await rescan()
+                    backoff = 1.0
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            continue
+                        entry = msg.json().get("params", {}).get("result")
+                        if not entry:
+                            continue
+                        pair = w3.to_checksum_address(entry["address"])
+                        if on_sync(pair, bytes.fromhex(entry["data"][2:])):
+                            dirty.update(deps[pair])
+                            wake.set()
+                log.warning("Sync subscription closed, reconnecting in %.0fs", backoff)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                log.warning("Sync subscription failed: %s, reconnecting in %.0fs", e, backoff)
+            if poller is None:
+                poller = asyncio.create_task(poll_blocks())
+            await rescan()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+    finally:
+        drainer.cancel()
+        if poller is not None:
+            poller.cancel()
+
+async def main(once: bool):
+    log_listener.start()
+    session = await open_session()
+    try:
+        if once:
+            await scan_all_paths()
+        elif WS_RPC:
+            await watch_syncs(session)
+        else:
+            poller = asyncio.create_task(poll_blocks())
+            try:
+                while True:
+                    await scan_all_paths()
+                    await asyncio.sleep(8)
+            finally:
+                poller.cancel()
+    finally:
+        await session.close()
+        log_listener.stop()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--once", action="store_true", help="Run once and exit")
     args = parser.parse_args()
 
-    if args.once:
-        scan_all_paths()
-    else:
-        while True:
-            scan_all_paths()
-            time.sleep(8)
+    asyncio.run(main(args.once))
@@ -1,11 +1,114 @@
-import asyncio
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
 import logging
+import time
+import types
+import numpy as np
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the pair scan falls back to plain NumPy
+    njit = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ArbitrageDetector")
 
+# Opportunities kept for stats/ranking (older ones rotate out)
+HISTORY_SIZE = 10_000
+
+# Simplified staking APYs (%) used by get_staking_apy
+_STAKING_APYS = types.MappingProxyType({
+    'CAKE': 25.5,
+    'BNB': 18.2,
+    'BTCB': 12.8,
+    'ETH': 15.3,
+    'USDT': 8.5,
+    'BUSD': 8.2,
+    'USDC': 7.8
+})
+
+@dataclass(slots=True, frozen=True)
+class Opportunity:
+    """One detected cross-DEX opportunity as kept in the detector's history"""
+    base_token: str
+    quote_token: str
+    buy_dex: str
+    sell_dex: str
+    buy_price: float
+    sell_price: float
+    trade_size_usd: float
+    profit_percent: float
+    gas_cost_usd: float
+    net_profit_usd: float
+    buy_liquidity: float
+    sell_liquidity: float
+    timestamp: float
+    confidence: str
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+def _trade_terms(buy_p, sell_p, buy_liq, sell_liq, buy_fee, sell_fee, max_trade, max_impact):
+    """Liquidity/impact-capped trade size and fee-adjusted profit percent of one buy/sell pair"""
+    size = min(buy_liq * 0.2, sell_liq * 0.2, max_trade)  # Use max 20% of liquidity
+    impact_buy = size / buy_liq * 100
+    impact_sell = size / sell_liq * 100
+    if impact_buy > max_impact or impact_sell > max_impact:
+        # Reduce trade size if price impact is too high
+        size *= min(max_impact / impact_buy, max_impact / impact_sell)
+    return size, (sell_p - buy_p) / buy_p * 100 - (buy_fee + sell_fee)
+
+trade_terms = njit(cache=True, fastmath=True)(_trade_terms) if njit else _trade_terms
+
+# Pair-scoring kernels live at module level so numba can compile and cache them.
+# Both take per-DEX arrays (prices, liquidity, fees, valid mask) and return
+# (buy_index, sell_index, net_profit_usd, trade_size_usd, profit_percent) of the best pair.
+# min_edge is the smallest fraction the sell price must clear over the buy price to
+# cover fees at all; pairs below it can never be profitable and are never scored.
+def _score_pairs(p, liq, fees, ok, max_trade, max_impact, gas_usd, min_edge):
+    # Walk buys in ascending price order; the sells worth trying are then a suffix
+    idx = np.nonzero(ok)[0]
+    order = idx[np.argsort(p[idx])]
+    sorted_p = p[order]
+    m = order.shape[0]
+    best_i, best_j = -1, -1
+    best_net, best_size, best_pct = 0.0, 0.0, 0.0
+    for a in range(m):
+        i = order[a]
+        for b in range(np.searchsorted(sorted_p, sorted_p[a] * (1 + min_edge), side='right'), m):
+            j = order[b]
+            size, pct = trade_terms(p[i], p[j], liq[i], liq[j], fees[i], fees[j], max_trade, max_impact)
+            net = size * pct / 100 - gas_usd
+            # Ties go to the lowest (buy, sell) index pair, as in a row-major scan
+            if best_i < 0 or net > best_net or (net == best_net and (i < best_i or (i == best_i and j < best_j))):
+                best_i, best_j, best_net, best_size, best_pct = i, j, net, size, pct
+    return best_i, best_j, best_net, best_size, best_pct
+
+def _score_pairs_numpy(p, liq, fees, ok, max_trade, max_impact, gas_usd, min_edge):
+    # Only buy (row) x sell (column) combinations whose spread clears min_edge
+    with np.errstate(invalid='ignore'):
+        cand = ok[:, None] & ok[None, :] & (p[None, :] > p[:, None] * (1 + min_edge))
+    i, j = np.nonzero(cand)
+    if i.size == 0:
+        return -1, -1, 0.0, 0.0, 0.0
+
+    trade_size = np.minimum(np.minimum(liq[i] * 0.2, liq[j] * 0.2), max_trade)
+    impact_buy = (trade_size / liq[i]) * 100
+    impact_sell = (trade_size / liq[j]) * 100
+    too_big = (impact_buy > max_impact) | (impact_sell > max_impact)
+    trade_size = np.where(
+        too_big,
+        trade_size * np.minimum(max_impact / impact_buy, max_impact / impact_sell),
+        trade_size
+    )
+    profit_percent = ((p[j] - p[i]) / p[i] * 100) - (fees[i] + fees[j])
+    net_profit = (trade_size * profit_percent / 100) - gas_usd
+
+    k = np.argmax(net_profit)
+    return int(i[k]), int(j[k]), float(net_profit[k]), float(trade_size[k]), float(profit_percent[k])
+
+score_pairs = njit(cache=True, fastmath=True)(_score_pairs) if njit else _score_pairs_numpy
+
 class ArbitrageDetector:
     def __init__(self):
         # Configuration
@@ -26,6 +129,17 @@ class ArbitrageDetector:
             'SushiSwap': {'fee': 0.3, 'priority': 2, 'flashloan_support': False}
         }
 
+        # DEX name -> position in the price/liquidity arrays analyze_opportunity takes
+        self._dex_names = list(self.dexes)
+        self.dex_index = {name: i for i, name in enumerate(self._dex_names)}
+        self._fees = np.array([info['fee'] for info in self.dexes.values()], dtype=np.float64)
+        # Any two DEXes charge at least twice the cheapest fee, so a smaller spread can't pay
+        self._min_edge = 2 * float(self._fees.min()) / 100
+        if njit:
+            # Pay the JIT compile (or cache load) here rather than on the first live pair
+            score_pairs(self._fees, self._fees, self._fees, np.ones(len(self._fees), dtype=np.bool_),
+                        1.0, 1.0, 0.0, 0.0)
+
         # Flash loan providers
         self.flashloan_providers = {
             'DODO': {'fee': 0.02, 'max_amount': 10000000},  # 0.02% fee, $10M max
@@ -33,13 +147,24 @@ class ArbitrageDetector:
             'UniswapV3': {'fee': 0.0, 'max_amount': 1000000}  # No fee for small amounts
         }
 
+        # Flash-loan-capable DEXes and provider fees, fixed for the detector's lifetime
+        self._flash_dexes = tuple(dex for dex, info in self.dexes.items() if info['flashloan_support'])
+        self._flash_providers = list(self.flashloan_providers.items())
+        self._flash_fees = np.array([config['fee'] for _, config in self._flash_providers], dtype=np.float64)
+
         # Staking opportunities tracking
         self.staking_opportunities = []
 
-        # Track historical opportunities
-        self.opportunity_history = []
+        # Track historical opportunities (bounded so long-running bots don't grow without limit)
+        self.opportunity_history = deque(maxlen=HISTORY_SIZE)
+        # Running totals over every recorded opportunity, kept in step by _record_opportunity
+        self._stats = {'n': 0, 'sum': 0.0, 'max': float('-inf'), 'min': float('inf'), 'max_op': None}
+        # Ring buffers mirroring the history as DEX indices + profit, for get_dex_ranking
+        self._hist_buy_idx = np.zeros(HISTORY_SIZE, dtype=np.intp)
+        self._hist_sell_idx = np.zeros(HISTORY_SIZE, dtype=np.intp)
+        self._hist_profit = np.zeros(HISTORY_SIZE, dtype=np.float64)
         
-    async def calculate_optimal_trade_size(
+    def calculate_optimal_trade_size(
         self,
         buy_price: float,
         sell_price: float,
@@ -49,142 +174,131 @@ class ArbitrageDetector:
         sell_fee: float
     ) -> Tuple[float, float]:
         """Calculate optimal trade size and expected profit"""
-        # Calculate maximum trade size based on liquidity
-        max_size = min(
-            buy_liquidity * 0.2,  # Use max 20% of liquidity
-            sell_liquidity * 0.2,
-            self.max_trade_size
+        return trade_terms(
+            float(buy_price), float(sell_price),
+            float(buy_liquidity), float(sell_liquidity),
+            float(buy_fee), float(sell_fee),
+            float(self.max_trade_size), float(self.max_price_impact)
         )
         
-        # Calculate price impact
-        price_impact_buy = (max_size / buy_liquidity) * 100
-        price_impact_sell = (max_size / sell_liquidity) * 100
-        
-        if price_impact_buy > self.max_price_impact or price_impact_sell > self.max_price_impact:
-            # Reduce trade size if price impact is too high
-            adjustment_factor = min(
-                self.max_price_impact / price_impact_buy,
-                self.max_price_impact / price_impact_sell
-            )
-            max_size *= adjustment_factor
-        
-        # Calculate total fees
-        total_fee_percent = buy_fee + sell_fee
-        
-        # Calculate potential profit
-        price_diff = sell_price - buy_price
-        profit_percent = (price_diff / buy_price * 100) - total_fee_percent
-        
-        return max_size, profit_percent
-        
     def estimate_gas_cost_usd(self, bnb_price: float) -> float:
         """Estimate gas cost in USD"""
         return self.gas_cost_bnb * bnb_price
         
-    async def analyze_opportunity(
+    def pack_prices(self, per_dex: Dict[str, Dict], field: str = 'price') -> np.ndarray:
+        """Convert a legacy {dex: {field: value}} dict into an array aligned with dex_index
+        (missing or zero values become NaN)"""
+        return np.fromiter(
+            (per_dex.get(d, {}).get(field) or np.nan for d in self._dex_names),
+            dtype=np.float64, count=len(self._dex_names)
+        )
+
+    def analyze_opportunity(
         self,
         token_pair: Tuple[str, str],
-        prices: Dict[str, Dict],
-        liquidity: Dict[str, Dict],
+        prices: Union[np.ndarray, Dict[str, Dict]],
+        liquidity: Union[np.ndarray, Dict[str, Dict]],
         bnb_price: float
     ) -> Optional[Dict]:
-        """Analyze arbitrage opportunity between DEXes"""
+        """Analyze arbitrage opportunity between DEXes
+
+        prices/liquidity are float arrays indexed by dex_index (NaN where a DEX has
+        no quote), or the legacy per-DEX dicts, which are packed with pack_prices.
+        """
+        now = time.time()  # one scan-time timestamp for whatever this call records
         base_token, quote_token = token_pair
-        
-        opportunities = []
-        for buy_dex in self.dexes:
-            for sell_dex in self.dexes:
-                if buy_dex == sell_dex:
-                    continue
-                    
-                # Get prices and liquidity
-                buy_price = prices.get(buy_dex, {}).get('price')
-                sell_price = prices.get(sell_dex, {}).get('price')
-                buy_liq = liquidity.get(buy_dex, {}).get('liquidity')
-                sell_liq = liquidity.get(sell_dex, {}).get('liquidity')
-                
-                if not all([buy_price, sell_price, buy_liq, sell_liq]):
-                    continue
-                    
-                # Calculate optimal trade size and profit
-                trade_size, profit_percent = await self.calculate_optimal_trade_size(
-                    buy_price,
-                    sell_price,
-                    buy_liq,
-                    sell_liq,
-                    self.dexes[buy_dex]['fee'],
-                    self.dexes[sell_dex]['fee']
-                )
-                
-                # Calculate gas costs
-                gas_cost_usd = self.estimate_gas_cost_usd(bnb_price)
-                
-                # Calculate net profit
-                net_profit_usd = (trade_size * profit_percent / 100) - gas_cost_usd
-                
-                if net_profit_usd > self.min_profit_threshold:
-                    opportunity = {
-                        'base_token': base_token,
-                        'quote_token': quote_token,
-                        'buy_dex': buy_dex,
-                        'sell_dex': sell_dex,
-                        'buy_price': buy_price,
-                        'sell_price': sell_price,
-                        'trade_size_usd': trade_size,
-                        'profit_percent': profit_percent,
-                        'gas_cost_usd': gas_cost_usd,
-                        'net_profit_usd': net_profit_usd,
-                        'buy_liquidity': buy_liq,
-                        'sell_liquidity': sell_liq,
-                        'timestamp': datetime.now().timestamp(),
-                        'confidence': min(
-                            prices[buy_dex].get('confidence', 'low'),
-                            prices[sell_dex].get('confidence', 'low')
-                        )
-                    }
-                    opportunities.append(opportunity)
-        
+        names = self._dex_names
+
+        price_info = prices if isinstance(prices, dict) else None
+        p = self.pack_prices(prices) if price_info is not None else np.asarray(prices, dtype=np.float64)
+        liq = (self.pack_prices(liquidity, 'liquidity') if isinstance(liquidity, dict)
+               else np.asarray(liquidity, dtype=np.float64))
+        ok = (p > 0) & (liq > 0)  # NaN compares False, so missing quotes drop out too
+
+        gas_cost_usd = self.estimate_gas_cost_usd(bnb_price)
+        i, j, net_profit_usd, trade_size, profit_percent = score_pairs(
+            p, liq, self._fees, ok, float(self.max_trade_size), float(self.max_price_impact), float(gas_cost_usd),
+            self._min_edge
+        )
+
         # Return the most profitable opportunity
-        if opportunities:
-            best_opportunity = max(opportunities, key=lambda x: x['net_profit_usd'])
-            self.opportunity_history.append(best_opportunity)
-            return best_opportunity
-        
-        return None
+        if i < 0 or not net_profit_usd > self.min_profit_threshold:
+            return None
+
+        buy_dex, sell_dex = names[i], names[j]
+        if price_info is not None:
+            confidence = min(price_info[buy_dex].get('confidence', 'low'),
+                             price_info[sell_dex].get('confidence', 'low'))
+        else:
+            confidence = 'low'
+        best_opportunity = Opportunity(
+            base_token=base_token,
+            quote_token=quote_token,
+            buy_dex=buy_dex,
+            sell_dex=sell_dex,
+            buy_price=float(p[i]),
+            sell_price=float(p[j]),
+            trade_size_usd=float(trade_size),
+            profit_percent=float(profit_percent),
+            gas_cost_usd=gas_cost_usd,
+            net_profit_usd=float(net_profit_usd),
+            buy_liquidity=float(liq[i]),
+            sell_liquidity=float(liq[j]),
+            timestamp=now,
+            confidence=confidence
+        )
+        self._record_opportunity(best_opportunity)
+        return best_opportunity.to_dict()
+
+    def _record_opportunity(self, opportunity: Opportunity):
+        """Append to history and fold the profit into the running stats"""
+        self.opportunity_history.append(opportunity)
+        profit = opportunity.net_profit_usd
+        stats = self._stats
+        slot = stats['n'] % HISTORY_SIZE
+        self._hist_buy_idx[slot] = self.dex_index[opportunity.buy_dex]
+        self._hist_sell_idx[slot] = self.dex_index[opportunity.sell_dex]
+        self._hist_profit[slot] = profit
+        stats['n'] += 1
+        stats['sum'] += profit
+        if profit > stats['max']:
+            stats['max'] = profit
+            stats['max_op'] = opportunity
+        if profit < stats['min']:
+            stats['min'] = profit
         
     def get_historical_stats(self) -> Dict:
-        """Get statistical analysis of historical opportunities"""
-        if not self.opportunity_history:
+        """Get statistical analysis of historical opportunities (O(1), from running totals)"""
+        stats = self._stats
+        if not stats['n']:
             return {}
-            
-        profits = [op['net_profit_usd'] for op in self.opportunity_history]
+
         return {
-            'total_opportunities': len(self.opportunity_history),
-            'avg_profit': sum(profits) / len(profits),
-            'max_profit': max(profits),
-            'min_profit': min(profits),
-            'total_profit': sum(profits),
-            'most_profitable_pair': max(
-                self.opportunity_history,
-                key=lambda x: x['net_profit_usd']
-            )
+            'total_opportunities': stats['n'],
+            'avg_profit': stats['sum'] / stats['n'],
+            'max_profit': stats['max'],
+            'min_profit': stats['min'],
+            'total_profit': stats['sum'],
+            'most_profitable_pair': stats['max_op'].to_dict()
         }
         
     def get_dex_ranking(self) -> List[Tuple[str, float]]:
         """Get DEX ranking based on profitable opportunities"""
-        if not self.opportunity_history:
+        m = min(self._stats['n'], HISTORY_SIZE)
+        if not m:
             return []
 
-        dex_profits = {}
-        for op in self.opportunity_history:
-            dex_profits.setdefault(op['buy_dex'], 0)
-            dex_profits.setdefault(op['sell_dex'], 0)
-            dex_profits[op['buy_dex']] += op['net_profit_usd'] / 2
-            dex_profits[op['sell_dex']] += op['net_profit_usd'] / 2
+        # Each opportunity credits half its profit to the buy and half to the sell DEX
+        n = len(self._dex_names)
+        buy, sell = self._hist_buy_idx[:m], self._hist_sell_idx[:m]
+        half = self._hist_profit[:m] / 2
+        totals = np.bincount(buy, weights=half, minlength=n) + np.bincount(sell, weights=half, minlength=n)
+        seen = (np.bincount(buy, minlength=n) + np.bincount(sell, minlength=n)) > 0
 
-        return sorted(dex_profits.items(), key=lambda x: x[1], reverse=True)
+        return [(self._dex_names[i], float(totals[i]))
+                for i in np.argsort(-totals, kind='stable') if seen[i]]
 
-    async def analyze_staking_opportunities(self, token_balances: Dict[str, float], investment_horizon: int = 30) -> List[Dict]:
+    def analyze_staking_opportunities(self, token_balances: Dict[str, float], investment_horizon: int = 30) -> List[Dict]:
         """Analyze staking opportunities vs arbitrage returns"""
         staking_opportunities = []
 
@@ -217,61 +331,42 @@ class ArbitrageDetector:
 
     def get_staking_apy(self, token: str) -> float:
         """Get staking APY for a token (simplified)"""
-        staking_apys = {
-            'CAKE': 25.5,
-            'BNB': 18.2,
-            'BTCB': 12.8,
-            'ETH': 15.3,
-            'USDT': 8.5,
-            'BUSD': 8.2,
-            'USDC': 7.8
-        }
-        return staking_apys.get(token, 5.0)
+        return _STAKING_APYS.get(token, 5.0)
 
-    async def find_flashloan_opportunities(self, token_pair: Tuple[str, str], prices: Dict[str, Dict]) -> List[Dict]:
+    def find_flashloan_opportunities(self, token_pair: Tuple[str, str], prices: Dict[str, Dict]) -> List[Dict]:
         """Find arbitrage opportunities that can use flash loans"""
         flash_opportunities = []
+        dexes = self._flash_dexes
+
+        # Gross profit of every buy (row) x sell (column) pair; missing prices and
+        # same-DEX pairs can never clear the threshold
+        p = np.fromiter((prices.get(d, {}).get('price') or np.nan for d in dexes), dtype=np.float64, count=len(dexes))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profit_mat = (p[None, :] - p[:, None]) / p[:, None] * 100
+        profit_mat[np.isnan(profit_mat)] = -np.inf
+        np.fill_diagonal(profit_mat, -np.inf)
+        # Widest spread can't beat even the cheapest provider: nothing to report
+        if profit_mat.max() - self._flash_fees.min() <= 0.1:
+            return flash_opportunities
 
-        for provider, config in self.flashloan_providers.items():
-            # Check if we can get a flash loan for the base token
-            base_token, quote_token = token_pair
-
-            # Find DEXes that support flash loans
-            flash_dexes = [dex for dex, info in self.dexes.items() if info['flashloan_support']]
-
-            for buy_dex in flash_dexes:
-                for sell_dex in flash_dexes:
-                    if buy_dex == sell_dex:
-                        continue
-
-                    buy_price = prices.get(buy_dex, {}).get('price')
-                    sell_price = prices.get(sell_dex, {}).get('price')
-
-                    if not buy_price or not sell_price:
-                        continue
-
-                    # Calculate arbitrage profit
-                    price_diff = sell_price - buy_price
-                    profit_percent = (price_diff / buy_price * 100)
-
-                    # Subtract flash loan fee
-                    net_profit_percent = profit_percent - config['fee']
-
-                    if net_profit_percent > 0.1:  # Minimum 0.1% profit after fees
-                        opportunity = {
-                            'token_pair': token_pair,
-                            'flash_provider': provider,
-                            'buy_dex': buy_dex,
-                            'sell_dex': sell_dex,
-                            'buy_price': buy_price,
-                            'sell_price': sell_price,
-                            'gross_profit_percent': profit_percent,
-                            'flash_fee': config['fee'],
-                            'net_profit_percent': net_profit_percent,
-                            'max_flash_amount': config['max_amount'],
-                            'atomic_transaction': True
-                        }
-                        flash_opportunities.append(opportunity)
+        for (provider, config), fee in zip(self._flash_providers, self._flash_fees):
+            # Subtract flash loan fee; minimum 0.1% profit after fees
+            for i, j in np.argwhere(profit_mat - fee > 0.1):
+                buy_dex, sell_dex = dexes[i], dexes[j]
+                profit_percent = float(profit_mat[i, j])
+                flash_opportunities.append({
+                    'token_pair': token_pair,
+                    'flash_provider': provider,
+                    'buy_dex': buy_dex,
+                    'sell_dex': sell_dex,
+                    'buy_price': prices[buy_dex]['price'],
+                    'sell_price': prices[sell_dex]['price'],
+                    'gross_profit_percent': profit_percent,
+                    'flash_fee': config['fee'],
+                    'net_profit_percent': profit_percent - config['fee'],
+                    'max_flash_amount': config['max_amount'],
+                    'atomic_transaction': True
+                })
 
         return flash_opportunities
 
@@ -1,9 +1,39 @@
+import asyncio
 import aiohttp
+import logging
 import os
-from typing import Optional, Dict
+import time
+import types
+from typing import Optional, Dict, List, Tuple, Any, Callable, Awaitable
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, aiohttp's stdlib json parsing is used instead
+    orjson = None
+
+logger = logging.getLogger('CoinAPIService')
+
+# Returned by _fetch_rate on HTTP 429 so the cache can serve the last good value
+_RATE_LIMITED = object()
+
+async def _read_json(response: aiohttp.ClientResponse) -> Any:
+    """Parse a response body, with orjson when it is installed"""
+    if orjson:
+        return orjson.loads(await response.read())
+    return await response.json()
+
+# Token symbol -> CoinAPI asset id, shared read-only by every instance
+_SYMBOL_MAP = types.MappingProxyType({
+    'USDT': 'USDT',
+    'WBNB': 'BNB',  # Map WBNB to BNB for CoinAPI
+    'ETH': 'ETH',
+    'BTC': 'BTC',
+    'CAKE': 'CAKE',
+    # Add more mappings as needed
+})
 
 class CoinAPIService:
-    def __init__(self):
+    def __init__(self, ttl: float = 3.0, stale_on_rate_limit: bool = True):
         self.api_key = os.getenv('COINAPI_KEY')
         if not self.api_key:
             raise ValueError("COINAPI_KEY environment variable not set")
@@ -14,72 +44,119 @@ class CoinAPIService:
             'Accept': 'application/json'
         }
         
-        # Cache for symbol mapping
-        self._symbol_map = {
-            'USDT': 'USDT',
-            'WBNB': 'BNB',  # Map WBNB to BNB for CoinAPI
-            'ETH': 'ETH',
-            'BTC': 'BTC',
-            'CAKE': 'CAKE',
-            # Add more mappings as needed
-        }
-        
+        self._symbol_map = _SYMBOL_MAP
+
+        # Shared keep-alive session, opened lazily by _session()
+        self._sess: Optional[aiohttp.ClientSession] = None
+
+        # Response cache: key -> (monotonic time stored, value), one lock per key
+        self.ttl = ttl
+        self.stale_on_rate_limit = stale_on_rate_limit
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._locks: Dict[Tuple, asyncio.Lock] = {}
+
+        # Rate-limit circuit breaker: after a 429 no request goes out until
+        # _cooldown_until; the wait doubles per consecutive 429 (capped at 60s)
+        self._cooldown_until = 0.0
+        self._backoff = 1.0
+
+    async def _session(self) -> aiohttp.ClientSession:
+        """Return the shared session, (re)creating it if needed"""
+        if self._sess is None or self._sess.closed:
+            self._sess = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=5)
+            )
+        return self._sess
+
+    async def close(self):
+        """Close the shared session"""
+        if self._sess is not None and not self._sess.closed:
+            await self._sess.close()
+
+    async def _cached(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Serve key from the cache while younger than ttl, otherwise fetch it.
+        Concurrent callers for the same key share a single request; on a rate
+        limit, or during the cool-off after one, the last good value is served
+        again and its TTL restarted.
+        """
+        entry = self._cache.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            entry = self._cache.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+
+            if time.monotonic() < self._cooldown_until:
+                value = _RATE_LIMITED
+            else:
+                value = await fetch()
+            if value is _RATE_LIMITED:
+                if self.stale_on_rate_limit and entry:
+                    self._cache[key] = (time.monotonic(), entry[1])
+                    return entry[1]
+                return None
+            if value is not None:
+                self._cache[key] = (time.monotonic(), value)
+            return value
+
+    async def _get_rate(self, base: str, quote: str) -> Optional[Dict]:
+        """
+        Get the CoinAPI exchange rate of base in quote (cached for ttl seconds)
+        Returns: Dict with 'rate' and 'time' or None if not found
+        """
+        return await self._cached((base, quote), lambda: self._fetch_rate(base, quote))
+
+    async def _fetch_rate(self, base: str, quote: str) -> Any:
+        try:
+            session = await self._session()
+            async with session.get(f"{self.base_url}/exchangerate/{base}/{quote}") as response:
+                if response.status == 200:
+                    data = await _read_json(response)
+                    self._backoff = 1.0
+                    return {'rate': float(data['rate']), 'time': data['time']}
+                elif response.status == 429:
+                    logger.warning("CoinAPI rate limit reached, backing off %.0fs", self._backoff)
+                    self._cooldown_until = time.monotonic() + self._backoff
+                    self._backoff = min(self._backoff * 2, 60.0)
+                    return _RATE_LIMITED
+                else:
+                    logger.error("CoinAPI error: %s", response.status)
+                    return None
+
+        except Exception:
+            logger.exception("Error fetching %s/%s from CoinAPI", base, quote)
+            return None
+
     async def get_token_price(self, symbol: str) -> Optional[Dict]:
         """
-        Get token price from CoinAPI
+        Get token price in USD from CoinAPI
         Returns: Dict with price and other metadata or None if not found
         """
-        try:
-            # Map token symbol to CoinAPI format
-            api_symbol = self._symbol_map.get(symbol, symbol)
-            
-            # Use USD as quote currency
-            endpoint = f"/exchangerate/{api_symbol}/USD"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}{endpoint}",
-                    headers=self.headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {
-                            'price': float(data['rate']),
-                            'timestamp': data['time'],
-                            'source': 'coinapi'
-                        }
-                    elif response.status == 429:
-                        print("CoinAPI rate limit reached")
-                        return None
-                    else:
-                        print(f"CoinAPI error: {response.status}")
-                        return None
-                        
-        except Exception as e:
-            print(f"Error fetching price from CoinAPI: {e}")
+        result = await self._get_rate(self._symbol_map.get(symbol, symbol), 'USD')
+        if result is None:
             return None
-            
+        return {'price': result['rate'], 'timestamp': result['time'], 'source': 'coinapi'}
+
+    async def get_token_prices(self, symbols: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Get several token prices concurrently over the shared session
+        Returns: Dict of symbol -> get_token_price result
+        """
+        results = await asyncio.gather(*(self.get_token_price(symbol) for symbol in symbols))
+        return dict(zip(symbols, results))
+
     async def get_exchange_rate(self, base_symbol: str, quote_symbol: str) -> Optional[float]:
         """
         Get exchange rate between two tokens
         Returns: Exchange rate or None if not found
         """
-        try:
-            base = self._symbol_map.get(base_symbol, base_symbol)
-            quote = self._symbol_map.get(quote_symbol, quote_symbol)
-            
-            endpoint = f"/exchangerate/{base}/{quote}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}{endpoint}",
-                    headers=self.headers
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return float(data['rate'])
-                    return None
-                    
-        except Exception as e:
-            print(f"Error fetching exchange rate from CoinAPI: {e}")
-            return None
+        result = await self._get_rate(
+            self._symbol_map.get(base_symbol, base_symbol),
+            self._symbol_map.get(quote_symbol, quote_symbol)
+        )
+        return result['rate'] if result else None
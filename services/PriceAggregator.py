@@ -1,23 +1,192 @@
+"""
+Multi-source token price aggregation (DEX APIs, CEX tickers, CoinAPI).
+
+Everything here is asyncio and network-bound, so host it on uvloop: call
+uvloop.install() in the entrypoint before asyncio.run(), as final_printer_2025.py
+does. This module never changes the event loop policy itself.
+"""
 import asyncio
 import aiohttp
-from web3 import Web3
-from typing import Dict, Optional, List, Tuple
+import heapq
 import json
+import logging
+import math
+import numpy as np
+import random
+import time
+from web3 import Web3
+from types import MappingProxyType
+from typing import Dict, Optional, List, Tuple, Callable, Awaitable, Iterable
+from yarl import URL
+from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
 from .CoinAPIService import CoinAPIService
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, stdlib json is used instead
+    orjson = None
+
+try:
+    from aiohttp_client_cache import CachedSession, SQLiteBackend
+except ImportError:  # aiohttp-client-cache is optional, every GET then goes to the network
+    CachedSession = None
+
+try:
+    import httpx
+    import h2  # noqa: F401 - required by httpx for http2=True
+except ImportError:  # httpx[http2] is optional, every source then goes through aiohttp
+    httpx = None
+
+try:
+    import brotli  # noqa: F401 - lets httpx decode br responses
+except ImportError:
+    try:
+        import brotlicffi as brotli  # noqa: F401
+    except ImportError:  # without a decoder, br must not be advertised
+        brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Sources with large JSON payloads, fetched over HTTP/2 (with Brotli if installed) when httpx is available
+HTTP2_SOURCES = frozenset({'dexscreener', 'coingecko'})
+
+# Sources queried by get_token_price, in task order (get_pair_prices_all_sources uses all but coinapi)
+TOKEN_SOURCES = ('dexscreener', 'pancakeswap', 'binance', 'geckoterminal', 'coingecko', 'coinapi')
+
+# _calculate_confidence's levels, best first: (max spread, min sources, label)
+CONFIDENCE_LEVELS = (
+    (0.01, 4, 'very_high'),  # 1% spread, 4+ sources
+    (0.02, 3, 'high'),       # 2% spread, 3+ sources
+    (0.05, 2, 'medium'),     # 5% spread, 2+ sources
+)
+
+# Sources priced from V3 pools by _fetch_v3_pool_price
+V3_SOURCES = ('pancakeswap_v3', 'uniswap_v3', 'sushiswap')
+
+def _settle(results: List, sources: Tuple[str, ...], label: str) -> List:
+    """Map the exceptions in gather(..., return_exceptions=True) results to None, logging each"""
+    settled = []
+    for src, result in zip(sources, results):
+        if isinstance(result, BaseException):
+            logger.warning("%s error for %s: %r", src, label, result)
+            result = None
+        settled.append(result)
+    return settled
+
+@dataclass(slots=True, frozen=True)
+class PriceStats:
+    """Summary of one set of per-source prices, shared by validation and confidence scoring"""
+    count: int
+    mean: float
+    low: float
+    high: float
+
+    @classmethod
+    def of(cls, prices: Iterable[Optional[float]]) -> 'PriceStats':
+        """Count, mean, min and max in one pass, skipping missing (None) prices"""
+        count, total, low, high = 0, 0.0, math.inf, -math.inf
+        for p in prices:
+            if p is None:
+                continue
+            count += 1
+            total += p
+            if p < low:
+                low = p
+            if p > high:
+                high = p
+        return cls(count, total / count if count else math.nan, low, high)
+
+async def bounded_gather(aws: Iterable[Awaitable], limit: int) -> List:
+    """Like gather(..., return_exceptions=True), but awaits at most `limit` at a time.
+    Pass a generator and coroutines are only created as slots free up."""
+    results: Dict[int, object] = {}
+    items = enumerate(aws)
+
+    async def worker():
+        for i, aw in items:
+            try:
+                results[i] = await aw
+            except Exception as e:
+                results[i] = e
+
+    await asyncio.gather(*(worker() for _ in range(limit)))
+    return [results[i] for i in range(len(results))]
+
+def _make_profit_fn(max_trade_size: float, min_profit: float) -> Callable[..., Dict]:
+    """Build calculate_profit_potential's arithmetic with one pair type's thresholds bound in"""
+    min_profit_pct = min_profit * 100
+
+    def profit(buy_price: float, sell_price: float, buy_fee: float, sell_fee: float,
+               liquidity: float) -> Dict:
+        # Calculate spread and fees
+        spread = (sell_price - buy_price) / buy_price
+        total_fee = buy_fee + sell_fee
+
+        # Calculate maximum trade size
+        max_trade = min(
+            liquidity * max_trade_size,
+            500000  # Hard cap at $500k per trade
+        )
+
+        # Calculate potential profit
+        gross_profit = max_trade * spread
+        fee_cost = max_trade * total_fee
+        net_profit = gross_profit - fee_cost
+        profit_percentage = net_profit / max_trade * 100
+
+        return {
+            'max_trade_size': max_trade,
+            'gross_profit': gross_profit,
+            'fee_cost': fee_cost,
+            'net_profit': net_profit,
+            'profit_percentage': profit_percentage,
+            'is_profitable': profit_percentage > min_profit_pct,
+            'spread': spread * 100,
+            'total_fee_percentage': total_fee * 100
+        }
+    return profit
+
+def weighted_median(x: np.ndarray, w: np.ndarray) -> float:
+    """Weighted median of x, interpolated between the centres of each sample's weight mass"""
+    order = np.lexsort((w, x))  # ties in x ordered by weight, so input order can't matter
+    x, w = x[order], w[order]
+    centres = np.cumsum(w) - 0.5 * w
+    return float(np.interp(0.5 * w.sum(), centres, x))
+
+def robust_price(x: np.ndarray, w: np.ndarray) -> float:
+    """Consensus of per-source prices x with weights w: drop outliers whose modified
+    z-score (MAD around the weighted median) is above 3.5, then weight-average the rest"""
+    centre = weighted_median(x, w)
+    dev = np.abs(x - centre)
+    mad = np.median(dev)
+    keep = 0.6745 * dev <= 3.5 * mad
+    if w[keep].sum() <= 0:
+        return centre
+    return float(np.average(x[keep], weights=w[keep]))
+
 class PriceAggregator:
-    def __init__(self):
+    def __init__(self, max_age: float = 1.0, swr_ttl: float = 2.0):
         self.price_sources = {
             'pancakeswap_v3': 'https://api.pancakeswap.finance/api/v3',
             'uniswap_v3': 'https://api.uniswap.org/v3',
             'sushiswap': 'https://api.sushi.com/v3',
             'biswap': 'https://api.biswap.org/v2',  # Keeping BiSwap as backup
-            'dex_aggregator': 'https://api.dexscreener.com/latest/dex'  # Quick validation only
+            'pancakeswap': 'https://api.pancakeswap.info/api/v2',
+            'dexscreener': 'https://api.dexscreener.com/latest/dex',  # Quick validation only
+            'geckoterminal': 'https://api.geckoterminal.com/api/v2/networks/bsc',
+            'coingecko': 'https://api.coingecko.com/api/v3',
+            'binance': 'https://api.binance.com/api/v3'
         }
+
+        # Source URLs parsed once; fetchers extend them with yarl's / operator
+        self._base_urls = {src: URL(base) for src, base in self.price_sources.items()}
+        self._coingecko_price_url = self._base_urls['coingecko'] / 'simple' / 'price'
+        self._binance_price_url = self._base_urls['binance'] / 'ticker' / 'price'
         
         # Initialize source weights for price aggregation
-        self.source_weights = {
+        self.source_weights = MappingProxyType({
             'chainlink': 5,      # Most reliable oracle
             'dexscreener': 4,    # Real-time DEX aggregator
             'pancakeswap': 4,    # Primary DEX
@@ -32,48 +201,56 @@ class PriceAggregator:
             'dextools': 2,       # DEX aggregator
             'coingecko': 2,      # Price aggregator
             'coinapi': 1         # Backup source
-        }
+        })
         
         # Initialize CoinAPI service
         try:
             self.coinapi_service = CoinAPIService()
         except ValueError as e:
-            print(f"Warning: CoinAPI not configured: {e}")
+            logger.warning("CoinAPI not configured: %s", e)
             self.coinapi_service = None
         
-        self.token_mappings = {
+        self.token_mappings = MappingProxyType({
             'BNB': {
                 'coingecko': 'binancecoin',
                 'binance': 'BNBUSDT',
                 'pancakeswap': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
-                'dexscreener': 'bsc/0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
-                'geckoterminal': 'bsc/bnb',
+                'dexscreener': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
+                'geckoterminal': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
                 'dextools': 'bnb'
             },
             'WBNB': {
                 'coingecko': 'binancecoin',
                 'binance': 'BNBUSDT',
-                'pancakeswap': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c'
+                'pancakeswap': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
+                'dexscreener': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
+                'geckoterminal': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c'
             },
             'ETH': {
                 'coingecko': 'ethereum',
                 'binance': 'ETHUSDT',
-                'pancakeswap': '0x2170Ed0880ac9A755fd29B2688956BD959F933F8'
+                'pancakeswap': '0x2170Ed0880ac9A755fd29B2688956BD959F933F8',
+                'dexscreener': '0x2170Ed0880ac9A755fd29B2688956BD959F933F8',
+                'geckoterminal': '0x2170Ed0880ac9A755fd29B2688956BD959F933F8'
             },
             'BTC': {
                 'coingecko': 'bitcoin',
                 'binance': 'BTCUSDT',
-                'pancakeswap': '0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c'
+                'pancakeswap': '0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c',
+                'dexscreener': '0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c',
+                'geckoterminal': '0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c'
             },
             'CAKE': {
                 'coingecko': 'pancakeswap-token',
                 'binance': 'CAKEUSDT',
-                'pancakeswap': '0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82'
+                'pancakeswap': '0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82',
+                'dexscreener': '0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82',
+                'geckoterminal': '0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82'
             }
-        }
+        })
 
         # Add stablecoin configuration with risk levels
-        self.stablecoins = {
+        self.stablecoins = MappingProxyType({
             'USDT': {
                 'address': '0x55d398326f99059fF775485246999027B3197955',
                 'risk': 'low',     # USDT is most liquid
@@ -94,10 +271,18 @@ class PriceAggregator:
                 'risk': 'medium',  # DAI has complex stability mechanism
                 'min_liquidity': 75000
             }
-        }
+        })
         
+        # V3 pool queries price every token against USDT (all use the PancakeSwap
+        # address): pool URL per V3 source, query params per token
+        self._v3_pool_urls = {src: self._base_urls[src] / 'pools' / 'by-tokens' for src in V3_SOURCES}
+        self._v3_pool_params = {
+            token: {'token0': mapping['pancakeswap'], 'token1': self.stablecoins['USDT']['address']}
+            for token, mapping in self.token_mappings.items()
+        }
+
         # Extreme optimization for profitability
-        self.validation_thresholds = {
+        self.validation_thresholds = MappingProxyType({
             'stablecoin': {
                 'max_deviation': 0.15,         # 15% for stablecoin pairs (catch extreme opportunities)
                 'min_profit': 0.0005,         # 0.05% minimum profit after fees
@@ -116,30 +301,243 @@ class PriceAggregator:
                 'max_trade_size': 0.25,       # 25% of pool liquidity
                 'min_sources': 1
             }
-        }
+        })
+
+        # Price/pair validation limits used by validate_price and validate_pair_price
+        self.max_stablecoin_deviation = 0.05  # 5% from peg or cross-source average
+        self.max_token_deviation = 0.10       # 10% from cross-source average
+        self.min_source_count = 1             # Sources needed for a consensus price
+        self.min_liquidity_usd = 50000        # $50k minimum pool liquidity
 
         # Define major tokens
-        self.major_tokens = {
+        self.major_tokens = MappingProxyType({
             'BTC': '0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c',
             'ETH': '0x2170Ed0880ac9A755fd29B2688956BD959F933F8',
             'BNB': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
             'WBNB': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c'
-        }
+        })
 
         # Define DEX fee structures for profit calculation
-        self.dex_fees = {
+        self.dex_fees = MappingProxyType({
             'pancakeswap_v3': 0.001,  # 0.1% (lowest fee tier)
             'uniswap_v3': 0.0005,     # 0.05% (lowest fee tier)
             'sushiswap': 0.0015,      # 0.15% (standard tier)
             'biswap': 0.001,          # 0.1%
             'unknown': 0.003          # 0.3% for unknown DEXes
+        })
+
+        # (max_deviation, min_profit, max_trade_size) per token type for validate_opportunity
+        self._hot_thresh = {
+            token_type: (t['max_deviation'], t['min_profit'], t['max_trade_size'])
+            for token_type, t in self.validation_thresholds.items()
         }
 
+        # Hot-path lookups for calculate_profit_potential: lowercased DEX fees, token
+        # type sets, and (max_trade_size, min_profit) per (base_type, quote_type)
+        self._dex_fees_lower = {dex.lower(): fee for dex, fee in self.dex_fees.items()}
+        self._unknown_fee = self.dex_fees['unknown']
+        self._stable_set = frozenset(self.stablecoins)
+        self._major_set = frozenset(self.major_tokens)
+        self._profit_thresholds = {}
+        for base_type in self.validation_thresholds:
+            for quote_type in self.validation_thresholds:
+                # Use more conservative threshold for mixed pairs
+                if base_type != quote_type:
+                    t = self.validation_thresholds[base_type if base_type != 'stablecoin' else quote_type]
+                else:
+                    t = self.validation_thresholds[base_type]
+                self._profit_thresholds[base_type, quote_type] = (t['max_trade_size'], t['min_profit'])
+        # calculate_profit_potential specialised per (base_type, quote_type)
+        self._profit_fn = {
+            pair_type: _make_profit_fn(*thresholds) for pair_type, thresholds in self._profit_thresholds.items()
+        }
+
+        # The same tables as arrays for calculate_profit_potential_batch, indexed by
+        # dex_id() and pair_type_id()
+        self._dex_ids = {dex.lower(): i for i, dex in enumerate(self.dex_fees)}
+        self._fee_arr = np.array(list(self.dex_fees.values()), dtype=np.float64)
+        self._token_type_ids = {token_type: i for i, token_type in enumerate(self.validation_thresholds)}
+        self._max_trade_arr, self._min_profit_arr = (
+            np.array(column, dtype=np.float64) for column in zip(*self._profit_thresholds.values())
+        )
+
+        # Shared keep-alive session for every source, opened lazily by _get_session()
+        self._session: Optional[aiohttp.ClientSession] = None
+        # HTTP/2 client for HTTP2_SOURCES, opened lazily by _get_http2_client()
+        self._http2 = None
+
+        # Per-source price cache: (source, token) -> (price, monotonic expiry), plus
+        # the fetch currently running for each key so concurrent misses share it
+        self._price_cache: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+
+        # get_token_price's cached per-source fetchers, in TOKEN_SOURCES order (CoinAPI,
+        # last, caches its own responses)
+        self._token_fetchers = (
+            ('dexscreener', self._fetch_dexscreener_price),
+            ('pancakeswap', self._fetch_pancakeswap_price),
+            ('binance', self._fetch_binance_price),
+            ('geckoterminal', self._fetch_geckoterminal_price),
+            ('coingecko', self._fetch_coingecko_price)
+        )
+
+        # get_token_price's source weights, in TOKEN_SOURCES order
+        self._token_source_weights = np.array([self.source_weights[s] for s in TOKEN_SOURCES], dtype=np.float64)
+
+        # Per-source cap on concurrent requests, created on first use by _get_json(),
+        # under an overall cap across every source
+        self._sem: Dict[str, asyncio.Semaphore] = {}
+        self.max_concurrent_fetches = 64
+        self._fetch_sem = asyncio.Semaphore(self.max_concurrent_fetches)
+
+        # Stale-while-revalidate cache of consensus prices: token -> (price, stats of the
+        # per-source USD prices behind it, monotonic time).
+        # Fresh for max_age seconds, then served for up to swr_ttl more while a refresh
+        # replaces it. _token_inflight holds the one running fetch per token, shared by
+        # background refreshes and every caller that has to wait
+        self.max_age = max_age
+        self.swr_ttl = swr_ttl
+        self._consensus_cache: Dict[str, Tuple[float, PriceStats, float]] = {}
+        self._token_inflight: Dict[str, asyncio.Task] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, (re)creating it if needed. With aiohttp-client-cache
+        installed, successful GETs are replayed from a local SQLite cache for a few seconds."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=64, ttl_dns_cache=300, keepalive_timeout=60)
+            # A stalled source must not hold a fetch slot for aiohttp's default 5 minutes
+            timeout = aiohttp.ClientTimeout(total=5, connect=1)
+            if CachedSession:
+                self._session = CachedSession(
+                    cache=SQLiteBackend(
+                        'prices.cache',
+                        expire_after=3,
+                        urls_expire_after={'*binance*': 1, '*coingecko*': 10},
+                        allowed_codes=(200,),
+                        allowed_methods=('GET',)
+                    ),
+                    connector=connector,
+                    timeout=timeout
+                )
+            else:
+                self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def _cached(self, src: str, token: str,
+                      coro_factory: Callable[[], Awaitable[Optional[float]]],
+                      ttl: float = 2.0) -> Optional[float]:
+        """Return src's price for token from the cache while fresh, otherwise fetch it.
+        Callers arriving while a fetch is running await that fetch instead of starting another."""
+        key = (src, token)
+        entry = self._price_cache.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(coro_factory())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f: self._store_price(key, f, ttl))
+        return await self._join(fut)
+
+    async def _join(self, fut: asyncio.Future, abandon: Optional[Callable[[], None]] = None):
+        """Await a fetch shared between callers. Shielded so one caller giving up doesn't
+        cancel it for the others. Once the last one waiting is cancelled the fetch still
+        runs to completion (and fills its cache), unless `abandon` is given to drop it."""
+        self._waiters[fut] = self._waiters.get(fut, 0) + 1
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            if abandon is not None and self._waiters[fut] == 1:
+                abandon()
+            raise
+        finally:
+            self._waiters[fut] -= 1
+            if not self._waiters[fut]:
+                del self._waiters[fut]
+
+    def _store_price(self, key: Tuple[str, str], fut: asyncio.Future, ttl: float):
+        """Done-callback of an in-flight fetch: cache a successful price for ttl seconds"""
+        self._inflight.pop(key, None)
+        if not fut.cancelled() and fut.exception() is None and fut.result() is not None:
+            self._price_cache[key] = (fut.result(), time.monotonic() + ttl)
+
+    async def _get_json(self, session: aiohttp.ClientSession, src: str, url: URL,
+                        params: Optional[Dict] = None, retries: int = 3) -> Optional[Dict]:
+        """GET url with at most 16 requests in flight per source (and max_concurrent_fetches
+        overall) and return the decoded body, or None on failure. 429 and 5xx responses are
+        retried with jittered exponential backoff, waiting at least as long as the server's
+        Retry-After (capped at 8s)."""
+        sem = self._sem.setdefault(src, asyncio.Semaphore(16))
+        for attempt in range(retries + 1):
+            async with sem, self._fetch_sem:
+                status, retry_after, body = await self._request(session, src, url, params)
+            if status == 200:
+                # Decoded from bytes, so vendor JSON content types parse too
+                return orjson.loads(body) if orjson else json.loads(body)
+            if (status != 429 and status < 500) or attempt == retries:
+                return None
+            # Back off outside the semaphore so other requests to the source can proceed
+            delay = min(8.0, 0.25 * 2 ** attempt) + random.random() * 0.1
+            if retry_after.isdigit():
+                delay = min(8.0, max(delay, float(retry_after)))
+            await asyncio.sleep(delay)
+        return None
+
+    async def _request(self, session: aiohttp.ClientSession, src: str, url: URL,
+                       params: Optional[Dict]) -> Tuple[int, str, Optional[bytes]]:
+        """One GET: (status, Retry-After header, body if the status is 200)"""
+        client = self._get_http2_client() if src in HTTP2_SOURCES else None
+        if client is not None:
+            response = await client.get(str(url), params=params)
+            body = response.content if response.status_code == 200 else None
+            return response.status_code, response.headers.get('Retry-After', ''), body
+        async with session.get(url, params=params) as response:
+            body = await response.read() if response.status == 200 else None
+            return response.status, response.headers.get('Retry-After', ''), body
+
+    def _get_http2_client(self):
+        """Return the shared HTTP/2 client, (re)creating it if needed; None without httpx[http2]"""
+        if httpx is None:
+            return None
+        if self._http2 is None or self._http2.is_closed:
+            self._http2 = httpx.AsyncClient(
+                http2=True,
+                headers={'accept-encoding': 'br, gzip' if brotli else 'gzip'},
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+                timeout=10.0
+            )
+        return self._http2
+
+    async def start(self):
+        """Open the shared sessions up front so the first scan doesn't pay for it"""
+        await self._get_session()
+        self._get_http2_client()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Stop background price refreshes and close the shared sessions (and CoinAPI's, if configured)"""
+        for task in list(self._token_inflight.values()):
+            task.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._http2 is not None and not self._http2.is_closed:
+            await self._http2.aclose()
+        if self.coinapi_service:
+            await self.coinapi_service.close()
+
     def get_token_type(self, token: str) -> str:
         """Determine token type for validation thresholds"""
-        if token in self.stablecoins:
+        if token in self._stable_set:
             return 'stablecoin'
-        elif token in self.major_tokens:
+        elif token in self._major_set:
             return 'major_token'
         return 'other_token'
 
@@ -148,29 +546,29 @@ class PriceAggregator:
                                  base_token: str, quote_token: str,
                                  liquidity: float) -> Dict:
         """Calculate potential profit considering all factors"""
-        # Get validation thresholds based on token types
-        base_type = self.get_token_type(base_token)
-        quote_type = self.get_token_type(quote_token)
-        
-        # Use more conservative threshold for mixed pairs
-        if base_type != quote_type:
-            thresholds = self.validation_thresholds[base_type if base_type != 'stablecoin' else quote_type]
-        else:
-            thresholds = self.validation_thresholds[base_type]
+        profit_fn = self._profit_fn[self.get_token_type(base_token), self.get_token_type(quote_token)]
+        buy_fee = self._dex_fees_lower.get(buy_dex.lower(), self._unknown_fee)
+        sell_fee = self._dex_fees_lower.get(sell_dex.lower(), self._unknown_fee)
+        return profit_fn(buy_price, sell_price, buy_fee, sell_fee, liquidity)
 
-        # Calculate spread and fees
-        spread = (sell_price - buy_price) / buy_price
-        buy_fee = self.dex_fees.get(buy_dex.lower(), self.dex_fees['unknown'])
-        sell_fee = self.dex_fees.get(sell_dex.lower(), self.dex_fees['unknown'])
-        total_fee = buy_fee + sell_fee
+    def dex_id(self, dex: str) -> int:
+        """Index of a DEX in the batch fee table (unknown DEXes share the 'unknown' fee)"""
+        return self._dex_ids.get(dex.lower(), self._dex_ids['unknown'])
 
-        # Calculate maximum trade size
-        max_trade = min(
-            liquidity * thresholds['max_trade_size'],
-            500000  # Hard cap at $500k per trade
-        )
+    def pair_type_id(self, base_token: str, quote_token: str) -> int:
+        """Index of a token pair's (base_type, quote_type) in the batch threshold tables"""
+        return (self._token_type_ids[self.get_token_type(base_token)] * len(self._token_type_ids)
+                + self._token_type_ids[self.get_token_type(quote_token)])
+
+    def calculate_profit_potential_batch(self, buy_price: np.ndarray, sell_price: np.ndarray,
+                                         liquidity: np.ndarray, buy_dex_id: np.ndarray,
+                                         sell_dex_id: np.ndarray, pair_type_id: np.ndarray) -> Dict[str, np.ndarray]:
+        """calculate_profit_potential over arrays of candidates at once; DEX and pair-type
+        ids come from dex_id() and pair_type_id()"""
+        spread = (sell_price - buy_price) / buy_price
+        total_fee = self._fee_arr[buy_dex_id] + self._fee_arr[sell_dex_id]
+        max_trade = np.minimum(liquidity * self._max_trade_arr[pair_type_id], 500000)  # Hard cap at $500k per trade
 
-        # Calculate potential profit
         gross_profit = max_trade * spread
         fee_cost = max_trade * total_fee
         net_profit = gross_profit - fee_cost
@@ -182,7 +580,7 @@ class PriceAggregator:
             'fee_cost': fee_cost,
             'net_profit': net_profit,
             'profit_percentage': profit_percentage,
-            'is_profitable': profit_percentage > thresholds['min_profit'] * 100,
+            'is_profitable': profit_percentage > self._min_profit_arr[pair_type_id] * 100,
             'spread': spread * 100,
             'total_fee_percentage': total_fee * 100
         }
@@ -201,10 +599,10 @@ class PriceAggregator:
         
         # Use appropriate thresholds based on pair type
         if base_type == 'stablecoin' and quote_type == 'stablecoin':
-            thresholds = self.validation_thresholds['stablecoin']
+            max_deviation, min_profit, _ = self._hot_thresh['stablecoin']
         else:
             # Use the more permissive threshold to catch more opportunities
-            thresholds = self.validation_thresholds[
+            max_deviation, min_profit, _ = self._hot_thresh[
                 'major_token' if base_type == 'major_token' or quote_type == 'major_token'
                 else 'other_token'
             ]
@@ -218,10 +616,10 @@ class PriceAggregator:
 
         # Validate price deviation
         price_diff = abs(sell_price - buy_price) / buy_price
-        if price_diff > thresholds['max_deviation']:
+        if price_diff > max_deviation:
             return {
                 'valid': False,
-                'reason': f'Price deviation {price_diff*100:.2f}% exceeds threshold {thresholds["max_deviation"]*100:.2f}%',
+                'reason': f'Price deviation {price_diff*100:.2f}% exceeds threshold {max_deviation*100:.2f}%',
                 'profit_info': profit_info
             }
 
@@ -238,7 +636,7 @@ class PriceAggregator:
         if not profit_info['is_profitable']:
             return {
                 'valid': False,
-                'reason': f'Insufficient profit margin {profit_info["profit_percentage"]:.2f}% vs required {thresholds["min_profit"]*100:.2f}%',
+                'reason': f'Insufficient profit margin {profit_info["profit_percentage"]:.2f}% vs required {min_profit*100:.2f}%',
                 'profit_info': profit_info
             }
 
@@ -250,103 +648,131 @@ class PriceAggregator:
         }
 
     async def _fetch_coingecko_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            coin_id = self.token_mappings[token]['coingecko']
-            url = f"{self.price_sources['coingecko']}/simple/price"
-            params = {'ids': coin_id, 'vs_currencies': 'usd'}
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data[coin_id]['usd']
-                return None
-        except Exception as e:
-            print(f"CoinGecko error for {token}: {e}")
-            return None
+        coin_id = self.token_mappings[token]['coingecko']
+        url = self._coingecko_price_url
+        params = {'ids': coin_id, 'vs_currencies': 'usd'}
+        
+        data = await self._get_json(session, 'coingecko', url, params=params)
+        if data is not None:
+            return data[coin_id]['usd']
+        return None
 
     async def _fetch_binance_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            symbol = self.token_mappings[token]['binance']
-            url = f"{self.price_sources['binance']}/ticker/price"
-            params = {'symbol': symbol}
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return float(data['price'])
-                return None
-        except Exception as e:
-            print(f"Binance error for {token}: {e}")
-            return None
+        symbol = self.token_mappings[token]['binance']
+        url = self._binance_price_url
+        params = {'symbol': symbol}
+        
+        data = await self._get_json(session, 'binance', url, params=params)
+        if data is not None:
+            return float(data['price'])
+        return None
+
+    async def _fetch_coingecko_prices(self, session: aiohttp.ClientSession, tokens: List[str]) -> Dict[str, float]:
+        """USD prices for several tokens from a single CoinGecko request"""
+        by_id: Dict[str, List[str]] = {}
+        for token in tokens:
+            coin_id = self.token_mappings.get(token, {}).get('coingecko')
+            if coin_id:
+                by_id.setdefault(coin_id, []).append(token)
+        if not by_id:
+            return {}
+
+        url = self._coingecko_price_url
+        params = {'ids': ','.join(by_id), 'vs_currencies': 'usd'}
+        data = await self._get_json(session, 'coingecko', url, params=params) or {}
+        return {
+            token: float(quote['usd'])
+            for coin_id, quote in data.items() if 'usd' in quote
+            for token in by_id.get(coin_id, ())
+        }
+
+    async def _fetch_binance_prices(self, session: aiohttp.ClientSession, tokens: List[str]) -> Dict[str, float]:
+        """USD prices for several tokens from a single Binance request"""
+        by_symbol: Dict[str, List[str]] = {}
+        for token in tokens:
+            symbol = self.token_mappings.get(token, {}).get('binance')
+            if symbol:
+                by_symbol.setdefault(symbol, []).append(token)
+        if not by_symbol:
+            return {}
+
+        url = self._binance_price_url
+        params = {'symbols': json.dumps(list(by_symbol), separators=(',', ':'))}
+        data = await self._get_json(session, 'binance', url, params=params) or []
+        return {
+            token: float(ticker['price'])
+            for ticker in data
+            for token in by_symbol.get(ticker['symbol'], ())
+        }
+
+    async def prefetch_token_prices(self, tokens: List[str], ttl: float = 2.0):
+        """Warm the price cache for many tokens with one CoinGecko and one Binance request,
+        so the get_token_price calls that follow skip those two per-token fetches"""
+        session = await self._get_session()
+        sources = ('coingecko', 'binance')
+        results = await asyncio.gather(
+            self._fetch_coingecko_prices(session, tokens),
+            self._fetch_binance_prices(session, tokens),
+            return_exceptions=True
+        )
+        expires = time.monotonic() + ttl
+        for src, prices in zip(sources, _settle(results, sources, 'batch')):
+            for token, price in (prices or {}).items():
+                self._price_cache[src, token] = (price, expires)
 
     async def _fetch_pancakeswap_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            token_address = self.token_mappings[token]['pancakeswap']
-            url = f"{self.price_sources['pancakeswap']}/tokens/{token_address}"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return float(data['data']['price'])
-                return None
-        except Exception as e:
-            print(f"PancakeSwap error for {token}: {e}")
-            return None
+        token_address = self.token_mappings[token]['pancakeswap']
+        url = self._base_urls['pancakeswap'] / 'tokens' / token_address
+        
+        data = await self._get_json(session, 'pancakeswap', url)
+        if data is not None:
+            return float(data['data']['price'])
+        return None
 
     async def _fetch_coinapi_price(self, token: str) -> Optional[float]:
         """Get price from CoinAPI"""
-        try:
-            if self.coinapi_service:
-                result = await self.coinapi_service.get_token_price(token)
-                if result:
-                    return result['price']
-            return None
-        except Exception as e:
-            print(f"CoinAPI error for {token}: {e}")
-            return None
+        if self.coinapi_service:
+            result = await self.coinapi_service.get_token_price(token)
+            if result:
+                return result['price']
+        return None
 
     async def _fetch_dexscreener_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            token_path = self.token_mappings[token]['dexscreener']
-            url = f"{self.price_sources['dexscreener']}/tokens/{token_path}"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('pairs'):
-                        # Filter for pairs with good liquidity and sort by volume
-                        valid_pairs = [p for p in data['pairs'] 
-                                     if float(p.get('liquidity', {}).get('usd', 0)) > 100000]
-                        valid_pairs.sort(key=lambda x: float(x.get('volume', {}).get('h24', 0)), reverse=True)
-                        
-                        if valid_pairs:
-                            # Use volume-weighted average price from top pairs
-                            total_volume = sum(float(p.get('volume', {}).get('h24', 0)) for p in valid_pairs[:5])
-                            if total_volume > 0:
-                                weighted_price = sum(
-                                    float(p['priceUsd']) * float(p.get('volume', {}).get('h24', 0))
-                                    for p in valid_pairs[:5]
-                                ) / total_volume
-                                return weighted_price
-                return None
-        except Exception as e:
-            print(f"DexScreener error for {token}: {e}")
-            return None
+        token_path = self.token_mappings[token]['dexscreener']
+        url = self._base_urls['dexscreener'] / 'tokens' / token_path
+        
+        data = await self._get_json(session, 'dexscreener', url)
+        pairs = data.get('pairs') if data is not None else None
+        if pairs:
+            # One pass keeping the 5 highest-volume pairs with good liquidity and a price
+            # in a min-heap of (volume, -position, price); earlier pairs win volume ties
+            top: List[Tuple[float, int, float]] = []
+            for k, p in enumerate(pairs):
+                price = p.get('priceUsd')
+                if not price or float(p.get('liquidity', {}).get('usd', 0)) <= 100000:
+                    continue
+                entry = (float(p.get('volume', {}).get('h24', 0)), -k, float(price))
+                if len(top) < 5:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+
+            if top:
+                vol, _, px = (np.array(column, dtype=np.float64) for column in zip(*top))
+                if vol.sum() > 0:
+                    # Volume-weighted price of the top pairs, less any outliers
+                    return robust_price(px, vol)
+        return None
 
     async def _fetch_geckoterminal_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            token_path = self.token_mappings[token]['geckoterminal']
-            url = f"{self.price_sources['geckoterminal']}/tokens/{token_path}"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('data', {}).get('attributes', {}).get('price_usd'):
-                        return float(data['data']['attributes']['price_usd'])
-                return None
-        except Exception as e:
-            print(f"GeckoTerminal error for {token}: {e}")
-            return None
+        token_path = self.token_mappings[token]['geckoterminal']
+        url = self._base_urls['geckoterminal'] / 'tokens' / token_path
+        
+        data = await self._get_json(session, 'geckoterminal', url)
+        if data is not None:
+            if data.get('data', {}).get('attributes', {}).get('price_usd'):
+                return float(data['data']['attributes']['price_usd'])
+        return None
 
     async def validate_price(self, token: str, price: float, liquidity: Optional[float] = None) -> bool:
         """Validate a token's price against configured thresholds"""
@@ -356,350 +782,212 @@ class PriceAggregator:
         # Check if token is a stablecoin
         if token in self.stablecoins:
             if abs(price - 1.0) > self.max_stablecoin_deviation:
-                print(f"Warning: {token} price ${price} deviates >5% from $1.00")
+                logger.warning("%s price $%s deviates >5%% from $1.00", token, price)
                 return False
                 
         # Validate liquidity if provided
         if liquidity is not None and liquidity < self.min_liquidity_usd:
-            print(f"Warning: {token} liquidity ${liquidity} below minimum ${self.min_liquidity_usd}")
+            logger.warning("%s liquidity $%s below minimum $%s", token, liquidity, self.min_liquidity_usd)
             return False
             
         return True
 
-    async def validate_pair_price(self, base_token: str, quote_token: str, price: float) -> bool:
-        """Validate a trading pair's price"""
-        # Both stablecoins - should be very close to 1:1
-        if base_token in self.stablecoins and quote_token in self.stablecoins:
+    def _stable_pair_ok(self, base_token: str, quote_token: str, price: float) -> bool:
+        """Both stablecoins - should be very close to 1:1"""
+        if base_token in self._stable_set and quote_token in self._stable_set:
             if abs(price - 1.0) > self.max_stablecoin_deviation:
-                print(f"Warning: {base_token}/{quote_token} price {price} deviates >5% from 1.0")
+                logger.warning("%s/%s price %s deviates >5%% from 1.0", base_token, quote_token, price)
                 return False
+        return True
+
+    async def validate_pair_price(self, base_token: str, quote_token: str, price: float,
+                                  stats: Optional[PriceStats] = None) -> bool:
+        """Validate a trading pair's price (against the stats of its per-source prices if already fetched)"""
+        if not self._stable_pair_ok(base_token, quote_token, price):
+            return False
         
         # Cross-reference with other sources
-        pair_prices = await self.get_pair_prices_all_sources(base_token, quote_token)
-        if pair_prices:
-            avg_price = sum(p for p in pair_prices if p is not None) / len([p for p in pair_prices if p is not None])
+        if stats is None:
+            stats = PriceStats.of(await self.get_pair_prices_all_sources(base_token, quote_token))
+        if stats.count:
+            avg_price = stats.mean
             deviation = abs(price - avg_price) / avg_price
             
             max_allowed = self.max_stablecoin_deviation if base_token in self.stablecoins or quote_token in self.stablecoins else self.max_token_deviation
             
             if deviation > max_allowed:
-                print(f"Warning: {base_token}/{quote_token} price {price} deviates >{max_allowed*100}% from average {avg_price}")
+                logger.warning("%s/%s price %s deviates >%s%% from average %s",
+                               base_token, quote_token, price, max_allowed * 100, avg_price)
                 return False
         
         return True
 
     async def get_pair_prices_all_sources(self, base_token: str, quote_token: str) -> List[Optional[float]]:
         """Get pair prices from all available sources"""
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self._fetch_dexscreener_price(session, f"{base_token}/{quote_token}"),
-                self._fetch_pancakeswap_price(session, f"{base_token}/{quote_token}"),
-                self._fetch_binance_price(session, f"{base_token}{quote_token}"),
-                self._fetch_geckoterminal_price(session, f"{base_token}-{quote_token}"),
-                self._fetch_coingecko_price(session, base_token)  # Will need to divide by quote price
-            ]
-            return await asyncio.gather(*tasks)
+        tasks = await self._pair_price_coros(base_token, quote_token)
+        return _settle(await asyncio.gather(*tasks, return_exceptions=True), TOKEN_SOURCES, f"{base_token}/{quote_token}")
 
-    async def get_token_price(self, token: str) -> Optional[Dict]:
-        """Get token price from multiple sources with validation"""
-        if token not in self.token_mappings:
-            return None
+    async def _pair_price_coros(self, base_token: str, quote_token: str) -> List[Awaitable[Optional[float]]]:
+        """One pair price per source, in TOKEN_SOURCES order (without coinapi)"""
+        session = await self._get_session()
+        return [self._source_pair_price(src, fetch, session, base_token, quote_token)
+                for src, fetch in self._token_fetchers]
 
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self._fetch_dexscreener_price(session, token),
-                self._fetch_pancakeswap_price(session, token),
-                self._fetch_binance_price(session, token),
-                self._fetch_geckoterminal_price(session, token),
-                self._fetch_coingecko_price(session, token),
-                self._fetch_coinapi_price(token)
-            ]
-            
-            prices = await asyncio.gather(*tasks)
-            valid_prices = [(p, i) for i, p in enumerate(prices) if p is not None]
-            
-            if len(valid_prices) < self.min_source_count:
-                print(f"Warning: {token} has fewer than {self.min_source_count} price sources")
-                return None
-                
-            prices_only = [p for p, _ in valid_prices]
-            if not prices_only:
-                return None
-                
-            # Get median price
-            prices_only.sort()
-            mid = len(prices_only) // 2
-            median_price = prices_only[mid] if len(prices_only) % 2 == 1 else (prices_only[mid-1] + prices_only[mid]) / 2
-            
-            # Validate the price
-            if not await self.validate_price(token, median_price):
-                return None
-                
-            return median_price
-
-    async def get_pair_price(self, base_token: str, quote_token: str = 'USDT') -> Optional[Dict]:
-        """Get price information for a trading pair with validation"""
-        base_price = await self.get_token_price(base_token)
-        if quote_token != 'USDT':
-            quote_price = await self.get_token_price(quote_token)
-            if base_price and quote_price:
-                pair_price = base_price / quote_price
-                
-                # Validate the pair price
-                if not await self.validate_pair_price(base_token, quote_token, pair_price):
-                    return None
-                    
-                return {
-                    'price': pair_price,
-                    'base_usd': base_price,
-                    'quote_usd': quote_price,
-                    'confidence': await self._calculate_confidence(base_token, quote_token, pair_price)
-                }
-        else:
-            if base_price:
-                if not await self.validate_price(base_token, base_price):
-                    return None
-                    
-                return {
-                    'price': base_price,
-                    'base_usd': base_price,
-                    'quote_usd': 1.0,
-                    'confidence': await self._calculate_confidence(base_token, 'USDT', base_price)
-                }
+    async def _source_pair_price(self, src: str, fetch: Callable[..., Awaitable[Optional[float]]],
+                                 session: aiohttp.ClientSession, base_token: str,
+                                 quote_token: str) -> Optional[float]:
+        """base/quote price on one source, from its cached USD prices of both legs"""
+        base_usd, quote_usd = await asyncio.gather(
+            self._cached(src, base_token, partial(fetch, session, base_token)),
+            self._cached(src, quote_token, partial(fetch, session, quote_token))
+        )
+        if base_usd and quote_usd:
+            return base_usd / quote_usd
         return None
 
-    async def _calculate_confidence(self, base_token: str, quote_token: str, price: float) -> str:
-        """Calculate confidence level for a pair price"""
-        # Get prices from all sources for comparison
-        prices = await self.get_pair_prices_all_sources(base_token, quote_token)
-        valid_prices = [p for p in prices if p is not None]
-        
-        if len(valid_prices) < self.min_source_count:
-            return 'low'
-            
-        # Calculate price spread
-        max_price = max(valid_prices)
-        min_price = min(valid_prices)
-        spread = (max_price - min_price) / price
-        
-        # Determine confidence based on spread and number of sources
-        if spread <= 0.01 and len(valid_prices) >= 4:  # 1% spread, 4+ sources
-            return 'very_high'
-        elif spread <= 0.02 and len(valid_prices) >= 3:  # 2% spread, 3+ sources
-            return 'high'
-        elif spread <= 0.05 and len(valid_prices) >= 2:  # 5% spread, 2+ sources
-            return 'medium'
-        else:
-            return 'low'
+    async def get_token_price(self, token: str) -> Optional[Dict]:
+        """Get token price from multiple sources with validation, served from the
+        consensus cache while fresh (or stale within swr_ttl, refreshing it in the background).
+        Concurrent callers for the same token share one fetch."""
+        quote = await self._token_quote(token)
+        return quote[0] if quote else None
 
-    async def _fetch_coingecko_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            coin_id = self.token_mappings[token]['coingecko']
-            url = f"{self.price_sources['coingecko']}/simple/price"
-            params = {'ids': coin_id, 'vs_currencies': 'usd'}
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data[coin_id]['usd']
-                return None
-        except Exception as e:
-            print(f"CoinGecko error for {token}: {e}")
-            return None
+    async def _token_quote(self, token: str) -> Optional[Tuple[float, PriceStats]]:
+        """get_token_price's consensus price together with the stats of the per-source
+        prices it was taken from"""
+        entry = self._consensus_cache.get(token)
+        if entry:
+            age = time.monotonic() - entry[2]
+            if age < self.max_age:
+                return entry[:2]
+            if age < self.max_age + self.swr_ttl:
+                self._token_fetch(token)
+                return entry[:2]
+        task = self._token_fetch(token)
+        return await self._join(task, partial(self._abandon_token_fetch, token, task))
 
-    async def _fetch_binance_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            symbol = self.token_mappings[token]['binance']
-            url = f"{self.price_sources['binance']}/ticker/price"
-            params = {'symbol': symbol}
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return float(data['price'])
-                return None
-        except Exception as e:
-            print(f"Binance error for {token}: {e}")
-            return None
+    def _token_fetch(self, token: str) -> asyncio.Task:
+        """Return the running fetch of token's consensus price, starting one if there is none"""
+        task = self._token_inflight.get(token)
+        if task is None:
+            task = asyncio.create_task(self._fetch_token_price(token))
+            self._token_inflight[token] = task
+            task.add_done_callback(lambda t: self._token_fetched(token, t))
+        return task
 
-    async def _fetch_pancakeswap_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            token_address = self.token_mappings[token]['pancakeswap']
-            url = f"{self.price_sources['pancakeswap']}/tokens/{token_address}"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return float(data['data']['price'])
-                return None
-        except Exception as e:
-            print(f"PancakeSwap error for {token}: {e}")
-            return None
+    def _abandon_token_fetch(self, token: str, task: asyncio.Task):
+        """Cancel a consensus price fetch its last caller gave up on (e.g. _both_legs
+        dropping a leg). Its per-source fetches still finish into the price cache."""
+        if self._token_inflight.get(token) is task:
+            del self._token_inflight[token]
+        task.cancel()
 
-    async def _fetch_coinapi_price(self, token: str) -> Optional[float]:
-        """Get price from CoinAPI"""
-        try:
-            if self.coinapi_service:
-                result = await self.coinapi_service.get_token_price(token)
-                if result:
-                    return result['price']
-            return None
-        except Exception as e:
-            print(f"CoinAPI error for {token}: {e}")
-            return None
+    def _token_fetched(self, token: str, task: asyncio.Task):
+        """Done-callback of a consensus price fetch started by _token_fetch"""
+        if self._token_inflight.get(token) is task:
+            del self._token_inflight[token]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Fetching %s price failed: %r", token, task.exception())
 
-    async def _fetch_dexscreener_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            token_path = self.token_mappings[token]['dexscreener']
-            url = f"{self.price_sources['dexscreener']}/tokens/{token_path}"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('pairs'):
-                        # Filter for pairs with good liquidity and sort by volume
-                        valid_pairs = [p for p in data['pairs'] 
-                                     if float(p.get('liquidity', {}).get('usd', 0)) > 100000]
-                        valid_pairs.sort(key=lambda x: float(x.get('volume', {}).get('h24', 0)), reverse=True)
-                        
-                        if valid_pairs:
-                            # Use volume-weighted average price from top pairs
-                            total_volume = sum(float(p.get('volume', {}).get('h24', 0)) for p in valid_pairs[:5])
-                            if total_volume > 0:
-                                weighted_price = sum(
-                                    float(p['priceUsd']) * float(p.get('volume', {}).get('h24', 0))
-                                    for p in valid_pairs[:5]
-                                ) / total_volume
-                                return weighted_price
-                return None
-        except Exception as e:
-            print(f"DexScreener error for {token}: {e}")
+    async def _fetch_token_price(self, token: str) -> Optional[Tuple[float, PriceStats]]:
+        """Fetch, validate and cache token's consensus price and its per-source stats"""
+        if token not in self.token_mappings:
             return None
 
-    async def _fetch_geckoterminal_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        try:
-            token_path = self.token_mappings[token]['geckoterminal']
-            url = f"{self.price_sources['geckoterminal']}/tokens/{token_path}"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('data', {}).get('attributes', {}).get('price_usd'):
-                        return float(data['data']['attributes']['price_usd'])
-                return None
-        except Exception as e:
-            print(f"GeckoTerminal error for {token}: {e}")
+        session = await self._get_session()
+        coros = [self._cached(src, token, partial(fetch, session, token)) for src, fetch in self._token_fetchers]
+        coros.append(self._fetch_coinapi_price(token))
+        
+        need = self.validation_thresholds[self.get_token_type(token)]['min_sources']
+        prices = await self._first_prices(coros, TOKEN_SOURCES, token, need)
+        valid_prices = [(p, i) for i, p in enumerate(prices) if p is not None]
+        
+        if len(valid_prices) < self.min_source_count:
+            logger.warning("%s has fewer than %s price sources", token, self.min_source_count)
             return None
-
-    async def validate_price(self, token: str, price: float, liquidity: Optional[float] = None) -> bool:
-        """Validate a token's price against configured thresholds"""
-        if not price or price <= 0:
-            return False
             
-        # Check if token is a stablecoin
-        if token in self.stablecoins:
-            if abs(price - 1.0) > self.max_stablecoin_deviation:
-                print(f"Warning: {token} price ${price} deviates >5% from $1.00")
-                return False
-                
-        # Validate liquidity if provided
-        if liquidity is not None and liquidity < self.min_liquidity_usd:
-            print(f"Warning: {token} liquidity ${liquidity} below minimum ${self.min_liquidity_usd}")
-            return False
+        prices_only = [p for p, _ in valid_prices]
+        if not prices_only:
+            return None
             
-        return True
-
-    async def validate_pair_price(self, base_token: str, quote_token: str, price: float) -> bool:
-        """Validate a trading pair's price"""
-        # Both stablecoins - should be very close to 1:1
-        if base_token in self.stablecoins and quote_token in self.stablecoins:
-            if abs(price - 1.0) > self.max_stablecoin_deviation:
-                print(f"Warning: {base_token}/{quote_token} price {price} deviates >5% from 1.0")
-                return False
+        # Weighted consensus price with outlying sources dropped
+        consensus_price = robust_price(
+            np.array(prices_only, dtype=np.float64),
+            self._token_source_weights[[i for _, i in valid_prices]]
+        )
         
-        # Cross-reference with other sources
-        pair_prices = await self.get_pair_prices_all_sources(base_token, quote_token)
-        if pair_prices:
-            avg_price = sum(p for p in pair_prices if p is not None) / len([p for p in pair_prices if p is not None])
-            deviation = abs(price - avg_price) / avg_price
-            
-            max_allowed = self.max_stablecoin_deviation if base_token in self.stablecoins or quote_token in self.stablecoins else self.max_token_deviation
+        # Validate the price
+        if not await self.validate_price(token, consensus_price):
+            return None
             
-            if deviation > max_allowed:
-                print(f"Warning: {base_token}/{quote_token} price {price} deviates >{max_allowed*100}% from average {avg_price}")
-                return False
-        
-        return True
+        stats = PriceStats.of(prices_only)
+        self._consensus_cache[token] = (consensus_price, stats, time.monotonic())
+        return consensus_price, stats
 
-    async def get_pair_prices_all_sources(self, base_token: str, quote_token: str) -> List[Optional[float]]:
-        """Get pair prices from all available sources"""
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self._fetch_dexscreener_price(session, f"{base_token}/{quote_token}"),
-                self._fetch_pancakeswap_price(session, f"{base_token}/{quote_token}"),
-                self._fetch_binance_price(session, f"{base_token}{quote_token}"),
-                self._fetch_geckoterminal_price(session, f"{base_token}-{quote_token}"),
-                self._fetch_coingecko_price(session, base_token)  # Will need to divide by quote price
-            ]
-            return await asyncio.gather(*tasks)
-
-    async def get_token_price(self, token: str) -> Optional[Dict]:
-        """Get token price from multiple sources with validation"""
-        if token not in self.token_mappings:
-            return None
+    async def get_token_prices(self, tokens: List[str], limit: int = 8) -> Dict[str, Optional[float]]:
+        """Get many token prices, with at most `limit` tokens being fetched at a time"""
+        results = await bounded_gather((self.get_token_price(token) for token in tokens), limit)
+        return dict(zip(tokens, _settle(results, tokens, 'token price')))
 
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self._fetch_dexscreener_price(session, token),
-                self._fetch_pancakeswap_price(session, token),
-                self._fetch_binance_price(session, token),
-                self._fetch_geckoterminal_price(session, token),
-                self._fetch_coingecko_price(session, token),
-                self._fetch_coinapi_price(token)
-            ]
-            
-            prices = await asyncio.gather(*tasks)
-            valid_prices = [(p, i) for i, p in enumerate(prices) if p is not None]
-            
-            if len(valid_prices) < self.min_source_count:
-                print(f"Warning: {token} has fewer than {self.min_source_count} price sources")
-                return None
-                
-            prices_only = [p for p, _ in valid_prices]
-            if not prices_only:
-                return None
-                
-            # Get median price
-            prices_only.sort()
-            mid = len(prices_only) // 2
-            median_price = prices_only[mid] if len(prices_only) % 2 == 1 else (prices_only[mid-1] + prices_only[mid]) / 2
-            
-            # Validate the price
-            if not await self.validate_price(token, median_price):
-                return None
-                
-            return median_price
+    async def _first_prices(self, coros: List[Awaitable[Optional[float]]], sources: Tuple[str, ...],
+                            label: str, need: int, timeout: float = 2.0,
+                            grace: float = 0.15) -> List[Optional[float]]:
+        """Run the source fetches concurrently and return their prices in source order as
+        soon as `need` have answered plus a short grace period for confirmations (or at
+        timeout). Fetches still running then are reported as None; the shared per-source
+        fetches behind them keep going and fill the price cache for the next call."""
+        tasks = [asyncio.ensure_future(c) for c in coros]
+        prices: List[Optional[float]] = [None] * len(tasks)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i = tasks.index(task)
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        logger.warning("%s error for %s: %r", sources[i], label, task.exception())
+                    else:
+                        prices[i] = task.result()
+                if sum(p is not None for p in prices) >= need:
+                    deadline = min(deadline, loop.time() + grace)
+        finally:
+            for task in pending:
+                task.cancel()
+        return prices
 
     async def get_pair_price(self, base_token: str, quote_token: str = 'USDT') -> Optional[Dict]:
         """Get price information for a trading pair with validation"""
-        base_price = await self.get_token_price(base_token)
         if quote_token != 'USDT':
-            quote_price = await self.get_token_price(quote_token)
+            base_price, quote_price = await self._both_legs(base_token, quote_token)
             if base_price and quote_price:
                 pair_price = base_price / quote_price
+                # Stablecoin pairs off peg are rejected before paying for the cross-source fetch
+                if not self._stable_pair_ok(base_token, quote_token, pair_price):
+                    return None
+                # One cross-source fetch, summarised once, serves both validation and confidence
+                stats = PriceStats.of(await self.get_pair_prices_all_sources(base_token, quote_token))
                 
                 # Validate the pair price
-                if not await self.validate_pair_price(base_token, quote_token, pair_price):
+                if not await self.validate_pair_price(base_token, quote_token, pair_price, stats):
                     return None
                     
                 return {
                     'price': pair_price,
                     'base_usd': base_price,
                     'quote_usd': quote_price,
-                    'confidence': await self._calculate_confidence(base_token, quote_token, pair_price)
+                    'confidence': await self._calculate_confidence(base_token, quote_token, pair_price, stats)
                 }
         else:
-            if base_price:
+            quote = await self._token_quote(base_token)
+            if quote:
+                base_price, stats = quote
                 if not await self.validate_price(base_token, base_price):
                     return None
                     
@@ -707,94 +995,49 @@ class PriceAggregator:
                     'price': base_price,
                     'base_usd': base_price,
                     'quote_usd': 1.0,
-                    'confidence': await self._calculate_confidence(base_token, 'USDT', base_price)
+                    # Score against the per-source USD prices this price was taken from
+                    'confidence': await self._calculate_confidence(base_token, 'USDT', base_price, stats)
                 }
         return None
 
-    async def _calculate_confidence(self, base_token: str, quote_token: str, price: float) -> str:
-        """Calculate confidence level for a pair price"""
-        # Get prices from all sources for comparison
-        prices = await self.get_pair_prices_all_sources(base_token, quote_token)
-        valid_prices = [p for p in prices if p is not None]
-        
-        if len(valid_prices) < self.min_source_count:
+    async def _both_legs(self, base_token: str, quote_token: str) -> Tuple[Optional[float], Optional[float]]:
+        """USD prices of both pair legs, fetched concurrently. As soon as one leg comes
+        back empty the other is cancelled, since the pair can't be priced anyway."""
+        base = asyncio.ensure_future(self.get_token_price(base_token))
+        quote = asyncio.ensure_future(self.get_token_price(quote_token))
+        pending = {base, quote}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if any(task.cancelled() or task.result() is None for task in done):
+                    return None, None
+            return base.result(), quote.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _calculate_confidence(self, base_token: str, quote_token: str, price: float,
+                                    stats: PriceStats) -> str:
+        """Calculate confidence level for a pair price from the stats of its per-source prices"""
+        if stats.count < self.min_source_count:
             return 'low'
             
         # Calculate price spread
-        max_price = max(valid_prices)
-        min_price = min(valid_prices)
-        spread = (max_price - min_price) / price
+        spread = (stats.high - stats.low) / price
         
         # Determine confidence based on spread and number of sources
-        if spread <= 0.01 and len(valid_prices) >= 4:  # 1% spread, 4+ sources
-            return 'very_high'
-        elif spread <= 0.02 and len(valid_prices) >= 3:  # 2% spread, 3+ sources
-            return 'high'
-        elif spread <= 0.05 and len(valid_prices) >= 2:  # 5% spread, 2+ sources
-            return 'medium'
-        else:
-            return 'low'
+        for max_spread, min_sources, label in CONFIDENCE_LEVELS:
+            if spread <= max_spread and stats.count >= min_sources:
+                return label
+        return 'low'
 
-    async def _fetch_pancakeswap_v3_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        """Get price directly from PancakeSwap V3 pool"""
-        try:
-            token_address = self.token_mappings[token]['pancakeswap']
-            # Direct V3 pool query
-            url = f"{self.price_sources['pancakeswap_v3']}/pools/by-tokens"
-            params = {
-                'token0': token_address,
-                'token1': self.stablecoins['USDT']['address']
-            }
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('pool'):
-                        return float(data['pool']['token0Price'])
-                return None
-        except Exception as e:
-            print(f"PancakeSwap V3 error for {token}: {e}")
-            return None
-
-    async def _fetch_uniswap_v3_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        """Get price directly from Uniswap V3 pool"""
-        try:
-            token_address = self.token_mappings[token]['pancakeswap']  # Use same address
-            url = f"{self.price_sources['uniswap_v3']}/pools/by-tokens"
-            params = {
-                'token0': token_address,
-                'token1': self.stablecoins['USDT']['address']
-            }
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('pool'):
-                        return float(data['pool']['token0Price'])
-                return None
-        except Exception as e:
-            print(f"Uniswap V3 error for {token}: {e}")
-            return None
-
-    async def _fetch_sushiswap_price(self, session: aiohttp.ClientSession, token: str) -> Optional[float]:
-        """Get price directly from SushiSwap V3 pool"""
-        try:
-            token_address = self.token_mappings[token]['pancakeswap']  # Use same address
-            url = f"{self.price_sources['sushiswap']}/pools/by-tokens"
-            params = {
-                'token0': token_address,
-                'token1': self.stablecoins['USDT']['address']
-            }
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('pool'):
-                        return float(data['pool']['token0Price'])
-                return None
-        except Exception as e:
-            print(f"SushiSwap error for {token}: {e}")
-            return None
+    async def _fetch_v3_pool_price(self, session: aiohttp.ClientSession, token: str, source: str) -> Optional[float]:
+        """Get price directly from a V3 pool on source (one of V3_SOURCES)"""
+        data = await self._get_json(session, source, self._v3_pool_urls[source], params=self._v3_pool_params[token])
+        if data is not None:
+            if data.get('pool'):
+                return float(data['pool']['token0Price'])
+        return None
 
     def calculate_v3_profit(self, price_a: float, price_b: float, 
                             liquidity: float, fee_tier: str) -> Dict:
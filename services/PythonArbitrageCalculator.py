@@ -5,43 +5,146 @@ Returns only valid JSON output with arbitrage opportunities and errors.
 """
 
 import json
+import math
 import sys
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple, Any
 import logging
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module is used instead
+    orjson = None
 
 # Configure logging to stderr only (not stdout which is for JSON)
 logging.basicConfig(level=logging.ERROR, stream=sys.stderr)
 
-class ArbitrageCalculator:
-    def __init__(self):
-        # BSC token addresses
-        self.TOKENS = {
-            'WBNB': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
-            'USDT': '0x55d398326f99059fF775485246999027B3197955',
-            'USDC': '0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d',
-            'BUSD': '0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56',
-            'CAKE': '0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82',
-            'BTCB': '0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c'
-        }
+# BSC token addresses
+TOKENS = {
+    'WBNB': '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c',
+    'USDT': '0x55d398326f99059fF775485246999027B3197955',
+    'USDC': '0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d',
+    'BUSD': '0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56',
+    'CAKE': '0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82',
+    'BTCB': '0x7130d2A12B9BCbFAe4f2634d864A1Ee1Ce3Ead9c'
+}
+TOKEN_SYMBOLS = list(TOKENS)
+TOKEN_IDX = {token: i for i, token in enumerate(TOKENS)}
 
-        # DEX router addresses
-        self.DEX_ROUTERS = {
-            'PANCAKESWAP': '0x10ED43C718714eb63d5aA57B78B54704E256024E',
-            'BISWAP': '0x3a6d8cA21D1CF76F653A67577FA0D27453350dD8',
-            'APESWAP': '0xcF0feBd3f17CEf5b47b0cD257aCf6025c5BFf3b7'
-        }
+# DEX router addresses
+DEX_ROUTERS = {
+    'PANCAKESWAP': '0x10ED43C718714eb63d5aA57B78B54704E256024E',
+    'BISWAP': '0x3a6d8cA21D1CF76F653A67577FA0D27453350dD8',
+    'APESWAP': '0xcF0feBd3f17CEf5b47b0cD257aCf6025c5BFf3b7'
+}
+
+# Common triangular arbitrage paths
+TRIANGULAR_PATHS = [
+    ['WBNB', 'USDT', 'BTCB'],
+    ['WBNB', 'BTCB', 'USDT'],
+    ['USDT', 'WBNB', 'BTCB'],
+    ['USDT', 'BTCB', 'WBNB'],
+    ['BTCB', 'WBNB', 'USDT'],
+    ['BTCB', 'USDT', 'WBNB']
+]
+
+# The same paths as token indices into the rate matrix built by _log_rate_matrix,
+# one row per path...
+TRIANGULAR_PATH_IDX = np.array([[TOKEN_IDX[t] for t in path] for path in TRIANGULAR_PATHS], dtype=np.intp)
+# ...and as token addresses, for the opportunities reported
+TRIANGULAR_PATHS_ADDR = [tuple(TOKENS[t] for t in path) for path in TRIANGULAR_PATHS]
+
+# Exchange rates used when Node.js passes no price data: (from, to) -> rate
+_FALLBACK_RATES = {
+    ('WBNB', 'USDT'): 567.0,    # 1 WBNB = 567 USDT
+    ('USDT', 'WBNB'): 1/567.0,  # 1 USDT = ~0.00176 WBNB
+    ('WBNB', 'BTCB'): 0.001,    # 1 WBNB = 0.001 BTCB
+    ('BTCB', 'WBNB'): 1000.0,   # 1 BTCB = 1000 WBNB
+    ('USDT', 'BTCB'): 0.00176,  # 1 USDT = 0.00176 BTCB
+    ('BTCB', 'USDT'): 567.0     # 1 BTCB = 567 USDT
+}
+
+# A path must return more than 0.5% to be reported; above _LOG_MAX_RETURN its
+# round-trip rate no longer fits a float
+_LOG_MIN_RETURN = math.log(1.005)
+_LOG_MAX_RETURN = math.log(sys.float_info.max)
+
+# Path tables at least this long are evaluated by the numba kernel. The script is
+# spawned per run, so smaller ones (like TRIANGULAR_PATHS) skip numba's import and JIT
+NUMBA_MIN_PATHS = 4096
+
+# numba.prange once _jit_path_log_returns has imported numba
+prange = range
+_path_log_returns_jit = None
 
-        # Common triangular arbitrage paths
-        self.TRIANGULAR_PATHS = [
-            ['WBNB', 'USDT', 'BTCB'],
-            ['WBNB', 'BTCB', 'USDT'],
-            ['USDT', 'WBNB', 'BTCB'],
-            ['USDT', 'BTCB', 'WBNB'],
-            ['BTCB', 'WBNB', 'USDT'],
-            ['BTCB', 'USDT', 'WBNB']
-        ]
+# Path-evaluation kernel at module level so numba can compile and cache it.
+# No fastmath: unusable pairs carry -inf log rates, which fastmath assumes away
+def _path_log_returns(log_rates, path_idx):
+    n, m = path_idx.shape
+    out = np.empty(n)
+    for i in prange(n):
+        total = 0.0
+        for h in range(m):
+            total += log_rates[path_idx[i, h], path_idx[i, (h + 1) % m]]
+        out[i] = total
+    return out
+
+def _path_log_returns_numpy(log_rates, path_idx):
+    return log_rates[path_idx, np.roll(path_idx, -1, axis=1)].sum(axis=1)
+
+def _jit_path_log_returns():
+    """The numba-compiled kernel, importing numba on first use; None if it isn't installed"""
+    global prange, _path_log_returns_jit
+    if _path_log_returns_jit is None:
+        try:
+            import numba
+        except ImportError:  # numba is optional, path_log_returns falls back to plain NumPy
+            _path_log_returns_jit = False
+        else:
+            prange = numba.prange
+            _path_log_returns_jit = numba.njit(parallel=True, cache=True)(_path_log_returns)
+    return _path_log_returns_jit or None
+
+def path_log_returns(log_rates, path_idx):
+    """Round-trip log return of every path (rows of token indices, closing back to the
+    first), threaded across paths by numba for tables of NUMBA_MIN_PATHS or more"""
+    if len(path_idx) >= NUMBA_MIN_PATHS:
+        kernel = _jit_path_log_returns()
+        if kernel is not None:
+            return kernel(log_rates, path_idx)
+    return _path_log_returns_numpy(log_rates, path_idx)
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON for stdout, with orjson when it is installed"""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, indent=None, separators=(',', ':')).encode()
+
+def loads(data: str) -> Any:
+    """Parse JSON input, with orjson when it is installed (its errors subclass json.JSONDecodeError)"""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def write_json(obj: Any):
+    """Write obj to stdout as one line of JSON"""
+    sys.stdout.buffer.write(dumps(obj) + b'\n')
+    sys.stdout.buffer.flush()
+
+def utc_timestamp() -> str:
+    """Current UTC time as ISO 8601 with a 'Z' suffix, e.g. 2025-01-01T12:00:00.123456Z"""
+    return datetime.now(timezone.utc).isoformat()[:-6] + 'Z'
+
+class ArbitrageCalculator:
+    # Instances carry no state; the tables are module-level constants, also
+    # reachable as class attributes
+    __slots__ = ()
+
+    TOKENS = TOKENS
+    DEX_ROUTERS = DEX_ROUTERS
+    TRIANGULAR_PATHS = TRIANGULAR_PATHS
+    TRIANGULAR_PATH_IDX = TRIANGULAR_PATH_IDX
+    TRIANGULAR_PATHS_ADDR = TRIANGULAR_PATHS_ADDR
 
     def calculate_opportunities(self, amount_in: float = 1.0, price_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -51,32 +154,54 @@ class ArbitrageCalculator:
             price_data: Real-time price data from Node.js (optional)
         Returns JSON with opportunities and any errors
         """
+        timestamp = utc_timestamp()
         try:
             opportunities = []
             errors = []
 
             # Use provided price data or fallback to hardcoded rates
             exchange_rates = self._get_exchange_rates(price_data)
+            log_rates = self._log_rate_matrix(exchange_rates)
+
+            # Round-trip log return of every path at once; only paths clearing
+            # the 0.5% minimum are turned into opportunities
+            log_returns = path_log_returns(log_rates, TRIANGULAR_PATH_IDX)
+            candidates = [
+                (TRIANGULAR_PATHS[i], TRIANGULAR_PATHS_ADDR[i], float(log_returns[i]))
+                for i in np.flatnonzero(log_returns > _LOG_MIN_RETURN)
+            ]
 
-            # Calculate opportunities for each path
-            for path in self.TRIANGULAR_PATHS:
-                try:
-                    opportunity = self._calculate_path_profit(path, amount_in, exchange_rates)
-                    if opportunity:
-                        opportunities.append(opportunity)
-                except Exception as e:
+            # Bellman-Ford catches a profitable loop across every quoted pair, including
+            # ones that are not in TRIANGULAR_PATHS
+            quoted_log_rates = self._log_rate_matrix(exchange_rates, missing=-np.inf)
+            cycle = self._find_profitable_cycle(quoted_log_rates)
+            if cycle:
+                path = [TOKEN_SYMBOLS[t] for t in cycle[:-1]]
+                rotations = [path[k:] + path[:k] for k in range(len(path))]
+                log_return = float(quoted_log_rates[cycle[:-1], cycle[1:]].sum())
+                if log_return > _LOG_MIN_RETURN and not any(rotation in TRIANGULAR_PATHS for rotation in rotations):
+                    candidates.append((path, tuple(TOKENS[token] for token in path), log_return))
+
+            # Checked up front rather than caught per path: a zero amount has no profit
+            # percentage, and the round-trip rate has to fit a float
+            if not amount_in:
+                candidates = []
+            for path, path_addr, log_return in candidates:
+                if log_return > _LOG_MAX_RETURN:
                     errors.append({
                         'path': path,
-                        'error': str(e),
+                        'error': 'round-trip rate overflows a float',
                         'type': 'path_calculation_error'
                     })
+                    continue
+                opportunities.append(self._calculate_path_profit(path_addr, amount_in, log_return))
 
             # Sort by profit percentage (highest first)
             opportunities.sort(key=lambda x: x.get('profit_percentage', 0), reverse=True)
 
             return {
                 'success': True,
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'timestamp': timestamp,
                 'opportunities': opportunities,
                 'errors': errors,
                 'total_opportunities': len(opportunities),
@@ -87,59 +212,91 @@ class ArbitrageCalculator:
         except Exception as e:
             return {
                 'success': False,
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'timestamp': timestamp,
                 'error': str(e),
                 'opportunities': [],
                 'errors': [{'type': 'general_error', 'error': str(e)}]
             }
 
-    def _calculate_path_profit(self, path: List[str], amount_in: float, exchange_rates: Dict[str, float]) -> Optional[Dict[str, Any]]:
+    def _log_rate_matrix(self, rates: np.ndarray, missing: float = 0.0) -> np.ndarray:
         """
-        Calculate profit for a specific triangular arbitrage path
+        Log of the _get_exchange_rates matrix; pairs without a rate count as `missing`
+        (by default log 0, i.e. 1:1) and non-positive rates as -inf (the path is worthless)
         """
-        try:
-            if len(path) != 3:
-                return None
-
-            token_a, token_b, token_c = path
+        log_rates = np.full(rates.shape, -np.inf)
+        np.log(rates, out=log_rates, where=rates > 0)
+        log_rates[np.isnan(rates)] = missing
+        return log_rates
 
-            # Calculate the arbitrage using provided exchange rates
-            # Start with amount_in of token_a
-            amount_b = amount_in * exchange_rates.get(f'{token_a}_{token_b}', 1.0)
-            amount_c = amount_b * exchange_rates.get(f'{token_b}_{token_c}', 1.0)
-            final_amount = amount_c * exchange_rates.get(f'{token_c}_{token_a}', 1.0)
+    def _find_profitable_cycle(self, log_rates: np.ndarray) -> Optional[List[int]]:
+        """
+        Bellman-Ford over -log rate, with -inf log rates (unquoted pairs) as no edge.
+        Returns a closed list of token indices whose rate product exceeds 1, or None
+        """
+        T = len(log_rates)
+        W = -log_rates
+        np.fill_diagonal(W, np.inf)
 
-            profit_percentage = ((final_amount - amount_in) / amount_in) * 100
+        # Every vertex starts at 0 (virtual source), relaxing all edges at once per pass;
+        # anything still improving on pass T sits on or behind a negative cycle
+        dist = np.zeros(T)
+        pred = np.full(T, -1)
+        cols = np.arange(T)
+        for _ in range(T):
+            cand = dist[:, None] + W
+            src = cand.argmin(axis=0)
+            improved = cand[src, cols] < dist - 1e-12
+            if not improved.any():
+                return None
+            dist = np.where(improved, cand[src, cols], dist)
+            pred = np.where(improved, src, pred)
 
-            # Only return profitable opportunities (> 0.5% for meaningful arbitrage)
-            if profit_percentage > 0.5:
-                # Convert profit to USD (approximate BNB price ~$567)
-                profit_usd = (final_amount - amount_in) * 567
+        v = int(np.flatnonzero(improved)[0])
+        for _ in range(T):
+            v = int(pred[v])
+        cycle = [v]
+        u = int(pred[v])
+        while u != v:
+            cycle.append(u)
+            u = int(pred[u])
+        cycle.reverse()  # pred points backwards along the cycle
+        return cycle + [cycle[0]]
 
-                return {
-                    'path': [self.TOKENS[token_a], self.TOKENS[token_b], self.TOKENS[token_c]],  # Array of token addresses
-                    'amountIn': amount_in,  # Number (float)
-                    'amountOut': final_amount,  # Number (float)
-                    'expectedProfitUSD': profit_usd,  # Number (USD value)
-                    'spread': profit_percentage,  # Profit percentage
-                    'router': 'PANCAKESWAP'  # String router name
-                }
+    def _calculate_path_profit(self, path_addr: Tuple[str, ...], amount_in: float, log_return: float) -> Dict[str, Any]:
+        """
+        Build the opportunity for an arbitrage path (token addresses, start token first)
+        from its round-trip log return
+        """
+        # Start with amount_in of the first token
+        final_amount = amount_in * math.exp(log_return)
+        profit_percentage = ((final_amount - amount_in) / amount_in) * 100
 
-            return None
+        # Convert profit to USD (approximate BNB price ~$567)
+        profit_usd = (final_amount - amount_in) * 567
 
-        except Exception as e:
-            logging.error(f"Error calculating path {path}: {e}")
-            return None
+        return {
+            'path': path_addr,  # Array of token addresses
+            'amountIn': amount_in,  # Number (float)
+            'amountOut': final_amount,  # Number (float)
+            'expectedProfitUSD': profit_usd,  # Number (USD value)
+            'spread': profit_percentage,  # Profit percentage
+            'router': 'PANCAKESWAP'  # String router name
+        }
 
-    def _get_exchange_rates(self, price_data: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    def _get_exchange_rates(self, price_data: Optional[Dict[str, Any]] = None) -> np.ndarray:
         """
-        Get exchange rates between token pairs
+        Get exchange rates between token pairs as a matrix indexed [from, to] by
+        token index, NaN where no rate is known
         Uses real price data when available, otherwise falls back to hardcoded rates
         """
+        n = len(TOKENS)
+        rates = np.full((n, n), np.nan)
+        idx = TOKEN_IDX
+
         if price_data and 'prices' in price_data:
             # Use real price data from Node.js
-            rates = {}
             prices = price_data['prices']
+            parsed = False
 
             # Extract rates from price data
             for pair_key, pair_data in prices.items():
@@ -147,28 +304,26 @@ class ArbitrageCalculator:
                     # pair_key format: "TOKEN1/TOKEN2"
                     if '/' in pair_key:
                         token1, token2 = pair_key.split('/')
-                        rate_key = f'{token1}_{token2}'
-                        rates[rate_key] = pair_data['price']
+                        parsed = True
+                        # Pairs outside TOKENS can't be on any path
+                        if token1 not in idx or token2 not in idx:
+                            continue
+                        i, j = idx[token1], idx[token2]
+                        rates[i, j] = pair_data['price']
 
                         # Also add reverse rate
-                        reverse_key = f'{token2}_{token1}'
-                        rates[reverse_key] = 1.0 / pair_data['price'] if pair_data['price'] > 0 else 1.0
+                        rates[j, i] = 1.0 / pair_data['price'] if pair_data['price'] > 0 else 1.0
 
             # If we got some real rates, use them
-            if rates:
-                print(f"Using {len(rates)} real exchange rates from Node.js", file=sys.stderr)
+            if parsed:
+                print(f"Using {np.count_nonzero(~np.isnan(rates))} real exchange rates from Node.js", file=sys.stderr)
                 return rates
 
         # Fallback to hardcoded rates
         print("Using fallback hardcoded exchange rates", file=sys.stderr)
-        return {
-            'WBNB_USDT': 567.0,    # 1 WBNB = 567 USDT
-            'USDT_WBNB': 1/567.0,  # 1 USDT = ~0.00176 WBNB
-            'WBNB_BTCB': 0.001,    # 1 WBNB = 0.001 BTCB
-            'BTCB_WBNB': 1000.0,   # 1 BTCB = 1000 WBNB
-            'USDT_BTCB': 0.00176,  # 1 USDT = 0.00176 BTCB
-            'BTCB_USDT': 567.0     # 1 BTCB = 567 USDT
-        }
+        for (token1, token2), rate in _FALLBACK_RATES.items():
+            rates[idx[token1], idx[token2]] = rate
+        return rates
 
 def main():
     """
@@ -189,7 +344,7 @@ def main():
         # Check for price data as second argument (JSON string)
         if len(sys.argv) > 2:
             try:
-                price_data = json.loads(sys.argv[2])
+                price_data = loads(sys.argv[2])
                 print(f"Received price data with {len(price_data.get('prices', {}))} price entries", file=sys.stderr)
             except json.JSONDecodeError as e:
                 print(f"Failed to parse price data JSON: {e}", file=sys.stderr)
@@ -200,18 +355,18 @@ def main():
         result = calculator.calculate_opportunities(amount_in, price_data)
 
         # Output only valid JSON to stdout
-        print(json.dumps(result, indent=None, separators=(',', ':')))
+        write_json(result)
 
     except Exception as e:
         # Return error as JSON
         error_result = {
             'success': False,
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'timestamp': utc_timestamp(),
             'error': str(e),
             'opportunities': [],
             'errors': [{'type': 'main_execution_error', 'error': str(e)}]
         }
-        print(json.dumps(error_result, indent=None, separators=(',', ':')))
+        write_json(error_result)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file